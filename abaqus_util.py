@@ -1,20 +1,173 @@
 import subprocess
 import os
+import sys
+import json
 import time
 import uuid
+import queue
+import signal
 import shutil
+import threading
+import multiprocessing as mp
 from config import (
     ABAQUS_COMMAND,
     ABAQUS_TIMEOUT,
+    ODB_SERVER,
+    ODB_PARSE_TIMEOUT,
+    ODB_STEP,
+    ODB_FRAME,
+    EXTRA_METRICS,
     RESULT_DIR,
     OPTIMIZATION_TARGET,
     NODE_LABEL,
-    PROJECT_ROOT
+    PROJECT_ROOT,
+    CACHE_ENABLED,
+    JOB_PARAMS_FILE,
+    MAX_CPU,
+    TOTAL_CPUS,
+    CPUS_PER_JOB,
+    LICENSE_TOKENS,
+    JOB_MEMORY_MB,
+    PARALLEL_FRACTION,
+    SOLVER_BACKEND,
+    SCRATCH_DIR,
+    SCRATCH_MIN_FREE_MB,
+    HARVEST_FILES,
+    FAILED_JOB_KEEP,
+    JOB_MONITOR,
+    MONITOR_INTERVAL
 )
+from eval_cache import EvaluationCache
+from run_log import run_log, debug
+from retention import write_job_info, STATUS_DONE, STATUS_FAILED
+from solver_backend import AbaqusBackend, FakeAbaqusBackend
+from job_monitor import JobMonitor
 
+# 每个进程首次访问时才建立数据库连接
+_cache = EvaluationCache() if CACHE_ENABLED else None
 
-def run_abaqus(run_dir, job_name, timeout=ABAQUS_TIMEOUT):
-    """运行Abaqus作业"""
+
+def abaqus_tokens(cpus):
+    """Abaqus分析作业占用的许可证令牌数: int(5 * N^0.422)"""
+    return int(5 * cpus ** 0.422)
+
+
+def available_memory_mb():
+    """当前可用物理内存(MB)，无法获取时返回None"""
+    try:
+        return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_AVPHYS_PAGES') / (1024 * 1024)
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+class JobScheduler:
+    """
+    作业调度器: 根据可用核数、内存和许可证令牌预算决定并发作业数和每个作业的CPU数
+    空闲资源在多个工作进程间共享，作业结束后释放，后续作业按剩余资源重新分配
+    """
+
+    def __init__(self, total_cpus=TOTAL_CPUS, max_jobs=MAX_CPU, cpus_per_job=CPUS_PER_JOB,
+                 token_budget=LICENSE_TOKENS, job_memory_mb=JOB_MEMORY_MB,
+                 parallel_fraction=PARALLEL_FRACTION):
+        """
+        :param total_cpus: 可用总核数，None为本机全部核数
+        :param max_jobs: 最大并发作业数
+        :param cpus_per_job: 每个作业的CPU数，"auto"为自动选择
+        :param token_budget: 许可证令牌预算，None为不限制
+        :param job_memory_mb: 每个作业预计内存(MB)，None为不限制
+        :param parallel_fraction: 单作业可并行比例(Amdahl加速模型)
+        """
+        self.total_cpus = total_cpus or os.cpu_count() or 1
+        self.cpus_per_job = None if cpus_per_job == "auto" else int(cpus_per_job)
+        self.token_budget = token_budget
+        self.parallel_fraction = parallel_fraction
+
+        # 内存限制的并发作业数
+        memory = available_memory_mb()
+        if job_memory_mb and memory:
+            max_jobs = min(max_jobs, max(1, int(memory // job_memory_mb)))
+        self.max_jobs = max_jobs
+
+        tokens = token_budget if token_budget is not None else abaqus_tokens(self.total_cpus) * max_jobs
+        self._check_fits(tokens)
+        self.planned_cpus = self._allocate(self.total_cpus, tokens, self.max_jobs)
+        self.max_jobs = min(self.max_jobs, self._jobs_for(self.planned_cpus, self.total_cpus, tokens,
+                                                          self.max_jobs))
+
+        # 跨进程共享的空闲资源(通过进程池初始化参数传给工作进程)
+        self._condition = mp.Condition()
+        self._free_cpus = mp.Value('i', self.total_cpus, lock=False)
+        self._free_tokens = mp.Value('i', tokens, lock=False)
+        self._running = mp.Value('i', 0, lock=False)
+
+    def _check_fits(self, tokens):
+        """资源全部空闲时至少能运行一个作业，否则说明配置有误(否则acquire会永远等待)"""
+        cpus = self.cpus_per_job or 1
+        if cpus > self.total_cpus:
+            raise ValueError(f"CPUS_PER_JOB={self.cpus_per_job} 超过可用总核数 TOTAL_CPUS={self.total_cpus}")
+        if abaqus_tokens(cpus) > tokens:
+            setting = f"CPUS_PER_JOB={self.cpus_per_job}" if self.cpus_per_job else "单核作业"
+            raise ValueError(f"许可证令牌预算 LICENSE_TOKENS={tokens} 不足以运行{setting} "
+                             f"(需要 {abaqus_tokens(cpus)} 个令牌)")
+
+    def speedup(self, cpus):
+        """单作业使用cpus个核时的加速比"""
+        p = self.parallel_fraction
+        return 1.0 / ((1 - p) + p / cpus)
+
+    @staticmethod
+    def _jobs_for(cpus, free_cpus, free_tokens, slots):
+        """每个作业cpus个核时可同时运行的作业数"""
+        return min(slots, free_cpus // cpus, free_tokens // abaqus_tokens(cpus))
+
+    def _allocate(self, free_cpus, free_tokens, slots):
+        """在剩余资源下为slots个作业选择吞吐量最高的单作业CPU数，资源不足返回0"""
+        choices = [self.cpus_per_job] if self.cpus_per_job else range(1, free_cpus + 1)
+        best_cpus, best_throughput = 0, 0.0
+        for cpus in choices:
+            jobs = self._jobs_for(cpus, free_cpus, free_tokens, slots)
+            throughput = jobs * self.speedup(cpus)
+            if jobs >= 1 and throughput > best_throughput + 1e-9:
+                best_cpus, best_throughput = cpus, throughput
+        return best_cpus
+
+    def describe(self):
+        tokens = "不限" if self.token_budget is None else self.token_budget
+        return (f"{self.max_jobs}个并发作业 × {self.planned_cpus}核 "
+                f"(总核数 {self.total_cpus}, 令牌预算 {tokens})")
+
+    def acquire(self):
+        """为即将启动的作业分配CPU数(资源不足时等待其他作业结束)"""
+        with self._condition:
+            while True:
+                slots = max(1, self.max_jobs - self._running.value)
+                cpus = self._allocate(self._free_cpus.value, self._free_tokens.value, slots)
+                if cpus:
+                    break
+                # 没有运行中的作业时资源已全部空闲，等待不会有结果
+                if self._running.value == 0:
+                    raise RuntimeError(f"空闲资源无法分配作业: {self.describe()}")
+                self._condition.wait()
+            self._free_cpus.value -= cpus
+            self._free_tokens.value -= abaqus_tokens(cpus)
+            self._running.value += 1
+        return cpus
+
+    def release(self, cpus):
+        """作业结束后归还资源"""
+        with self._condition:
+            self._free_cpus.value += cpus
+            self._free_tokens.value += abaqus_tokens(cpus)
+            self._running.value -= 1
+            self._condition.notify_all()
+
+
+def run_abaqus(run_dir, job_name, timeout=ABAQUS_TIMEOUT, cpus=1, monitor=JOB_MONITOR, total_time=None):
+    """
+    运行Abaqus作业
+    :param monitor: 运行中监视.sta/.msg，出现不收敛迹象时提前终止作业
+    :param total_time: 分析步总时间(由模板计算)，None时由监视器扫描作业的INP
+    """
     os.makedirs(run_dir, exist_ok=True)
 
     # 检查INP文件是否存在
@@ -24,25 +177,46 @@ def run_abaqus(run_dir, job_name, timeout=ABAQUS_TIMEOUT):
         return False, None
 
     # 构建Abaqus命令
-    command = f"{ABAQUS_COMMAND} job={job_name} input={job_name}.inp interactive cpus=1 mp_mode=threads"
-    print(f"▶ 正在运行Abaqus: {command} @ {run_dir}")
+    command = f"{ABAQUS_COMMAND} job={job_name} input={job_name}.inp interactive cpus={cpus} mp_mode=threads"
+    debug(f"▶ 正在运行Abaqus: {command} @ {run_dir}")
 
     try:
-        # 执行Abaqus命令
-        result = subprocess.run(
+        # 执行Abaqus命令(独立进程组，超时或提前终止时连同求解进程一起结束)
+        proc = subprocess.Popen(
             command,
             shell=True,
             cwd=run_dir,
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
-            timeout=timeout
+            start_new_session=(sys.platform != "win32")
         )
+        watcher = JobMonitor(run_dir, job_name, timeout, total_time=total_time) if monitor else None
+        start = time.time()
+        while True:
+            try:
+                # 定期返回检查作业状态(communicate超时后可再次调用，输出不会丢失)
+                _, stderr = proc.communicate(timeout=MONITOR_INTERVAL)
+                break
+            except subprocess.TimeoutExpired:
+                elapsed = time.time() - start
+                if timeout is not None and elapsed > timeout:
+                    kill_process_tree(proc)
+                    proc.communicate()
+                    raise subprocess.TimeoutExpired(command, timeout)
+                reason = watcher.check(elapsed) if watcher is not None else None
+                if reason is not None:
+                    kill_process_tree(proc)
+                    proc.communicate()
+                    print(f"🛑 提前终止作业 {job_name}: {reason} ({watcher.describe()}, 已运行{elapsed:.0f}秒)")
+                    run_log.event("job_killed", job=job_name, reason=reason, elapsed=elapsed,
+                                  cutbacks=watcher.cutbacks, progress=watcher.progress)
+                    return False, None
 
         # 检查执行结果
-        if result.returncode != 0:
+        if proc.returncode != 0:
             # 打印完整的错误信息
-            error_msg = result.stderr.decode(errors='ignore')
-            print(f"❌ Abaqus执行失败 (code={result.returncode}):")
+            error_msg = stderr.decode(errors='ignore')
+            print(f"❌ Abaqus执行失败 (code={proc.returncode}):")
             print(error_msg[:500])  # 打印前500个字符的错误信息
 
             # 尝试读取日志文件获取更多错误信息
@@ -71,99 +245,391 @@ def run_abaqus(run_dir, job_name, timeout=ABAQUS_TIMEOUT):
         return False, None
 
 
-def parse_result_from_odb(odb_path):
-    """通过Abaqus Python环境解析ODB文件"""
-    # 获取当前脚本目录
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    parser_script = os.path.join(script_dir, "parse_odb.py")
+def kill_process_tree(proc):
+    """终止通过shell启动的进程及其子进程"""
+    if proc.poll() is not None:
+        return
+    try:
+        if sys.platform == "win32":
+            subprocess.run(f"taskkill /F /T /PID {proc.pid}", shell=True,
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        else:
+            os.killpg(proc.pid, signal.SIGKILL)
+    except Exception:
+        proc.kill()
 
-    # 构建命令 - 添加完整路径确保可执行
-    cmd = f"{ABAQUS_COMMAND} python \"{parser_script}\" \"{odb_path}\" {OPTIMIZATION_TARGET} {NODE_LABEL}"
 
-    print(f"🔍 解析ODB文件: {cmd}")
+# parse_odb.py输出结果行的前缀
+RESULT_PREFIX = "RESULT "
+
 
+def _decode_output(data):
+    """解码Abaqus输出(优先UTF-8，失败时尝试GBK)"""
     try:
-        result = subprocess.run(
+        return data.decode('utf-8')
+    except UnicodeDecodeError:
+        return data.decode('gbk', errors='replace')
+
+
+class OdbExtractionServer:
+    """常驻ODB解析服务客户端(每个工作进程维护一个abaqus python进程)"""
+
+    def __init__(self, timeout=ODB_PARSE_TIMEOUT):
+        self.timeout = timeout
+        self._proc = None
+        self._lines = None
+        self._pid = None
+
+    def _start(self):
+        """启动解析服务进程"""
+        parser_script = os.path.join(PROJECT_ROOT, "parse_odb.py")
+        cmd = f"{ABAQUS_COMMAND} python \"{parser_script}\" --server"
+        debug(f"🔌 启动ODB解析服务: {cmd}")
+        self._proc = subprocess.Popen(
             cmd,
             shell=True,
+            stdin=subprocess.PIPE,
             stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            timeout=60
+            stderr=subprocess.STDOUT,
+            start_new_session=(sys.platform != "win32")
         )
+        # 后台线程逐行读取输出，便于带超时等待结果
+        self._lines = queue.Queue()
+        threading.Thread(target=self._read_output, args=(self._proc, self._lines), daemon=True).start()
+        self._pid = os.getpid()
 
-        # 不需要手动解码，因为使用 PIPE 返回的是字节
-        stdout = result.stdout
-        stderr = result.stderr
+    @staticmethod
+    def _read_output(proc, lines):
+        for line in iter(proc.stdout.readline, b''):
+            lines.put(line)
+        lines.put(None)
 
-        if result.returncode != 0:
-            print(f"❌ ODB解析失败 (code={result.returncode}):")
+    def request(self, payload):
+        """发送一次解析请求并等待结果(JSON记录)"""
+        # fork继承的服务进程属于父进程(读取线程也未被继承)，子进程需启动自己的服务
+        if self._pid != os.getpid():
+            self._proc = None
+        if self._proc is None or self._proc.poll() is not None:
+            self._start()
 
-            # 尝试解码错误信息
-            try:
-                stderr_str = stderr.decode('utf-8', errors='replace')
-                print(f"标准错误输出:\n{stderr_str}")
-            except:
-                print(f"标准错误输出 (原始字节):\n{stderr}")
+        self._proc.stdin.write((json.dumps(payload) + "\n").encode('utf-8'))
+        self._proc.stdin.flush()
 
-            # 尝试解码标准输出
+        deadline = time.time() + self.timeout
+        while True:
             try:
-                stdout_str = stdout.decode('utf-8', errors='replace')
-                print(f"标准输出:\n{stdout_str}")
-            except:
-                print(f"标准输出 (原始字节):\n{stdout}")
+                line = self._lines.get(timeout=max(0.0, deadline - time.time()))
+            except queue.Empty:
+                self.close()
+                raise subprocess.TimeoutExpired("parse_odb.py --server", self.timeout)
+            if line is None:
+                self.close()
+                raise RuntimeError("ODB解析服务意外退出")
 
-            return float('inf')
+            text = _decode_output(line).strip()
+            if text.startswith(RESULT_PREFIX):
+                return json.loads(text[len(RESULT_PREFIX):])
+            if text:
+                debug(f"ODB解析输出: {text}")
 
-        # 提取结果
+    def close(self):
+        """关闭解析服务进程(不关闭从父进程继承的服务)"""
+        if self._proc is None or self._pid != os.getpid():
+            self._proc = None
+            return
         try:
-            # 尝试解码输出
-            output = stdout.decode('utf-8', errors='replace').strip()
-            print(f"ODB解析输出: {output}")
-            return float(output)
-        except UnicodeDecodeError:
-            # 如果UTF-8解码失败，尝试其他编码
-            try:
-                output = stdout.decode('gbk', errors='replace').strip()
-                print(f"ODB解析输出 (GBK): {output}")
-                return float(output)
-            except:
-                print(f"❌ 无法解码ODB输出: {stdout}")
-                return float('inf')
-        except ValueError:
-            print(f"❌ 无法解析ODB输出为浮点数: {output}")
-            return float('inf')
+            if self._proc.poll() is None:
+                self._proc.stdin.write(b"QUIT\n")
+                self._proc.stdin.flush()
+                self._proc.wait(timeout=10)
+        except Exception:
+            kill_process_tree(self._proc)
+        self._proc = None
+
+
+# 工作进程退出时标准输入关闭，解析服务随之结束
+_odb_server = OdbExtractionServer() if ODB_SERVER else None
+
+
+def extract_metrics(odb_path, metrics, node=NODE_LABEL, step=ODB_STEP, frame=ODB_FRAME):
+    """
+    打开一次ODB提取多个指标
+    :param metrics: 指标列表，如 ["max_stress", "disp:2", "rf:FIX_XY", "volume"]
+    :param node: max_disp指标的默认节点
+    :return: {指标: 数值}，失败的指标为inf
+    """
+    failed = {metric: float('inf') for metric in metrics}
+    payload = {"odb": odb_path, "metrics": list(metrics), "node": node,
+               "step": step, "frame": frame}
+
+    if _odb_server is not None:
+        try:
+            results = _odb_server.request(payload)
+            debug(f"ODB解析输出: {results}")
+            return {**failed, **results}
+        except Exception as e:
+            print(f"⚠️ ODB解析服务失败，改用单次解析: {str(e)}")
+
+    parser_script = os.path.join(PROJECT_ROOT, "parse_odb.py")
+
+    # 构建命令 - 添加完整路径确保可执行
+    cmd = (f"{ABAQUS_COMMAND} python \"{parser_script}\" \"{odb_path}\" "
+           f"--metrics {','.join(metrics)} --node {node} --frame {frame}")
+    if step is not None:
+        cmd += f" --step \"{step}\""
+
+    debug(f"🔍 解析ODB文件: {cmd}")
+
+    try:
+        result = subprocess.run(
+            cmd,
+            shell=True,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            timeout=ODB_PARSE_TIMEOUT
+        )
+
+        stdout = _decode_output(result.stdout)
+        if result.returncode != 0:
+            print(f"❌ ODB解析失败 (code={result.returncode}):")
+            print(f"标准错误输出:\n{_decode_output(result.stderr)}")
+            print(f"标准输出:\n{stdout}")
+            return failed
+
+        # 提取结果行，其余输出为解析日志
+        for line in stdout.splitlines():
+            line = line.strip()
+            if line.startswith(RESULT_PREFIX):
+                results = json.loads(line[len(RESULT_PREFIX):])
+                debug(f"ODB解析输出: {results}")
+                return {**failed, **results}
+            if line:
+                debug(f"ODB解析输出: {line}")
+
+        print(f"❌ 未找到ODB解析结果: {stdout}")
+        return failed
 
     except subprocess.TimeoutExpired:
         print(f"⏱️ ODB解析超时: {cmd}")
-        return float('inf')
+        return failed
 
     except Exception as e:
         print(f"❌ ODB解析异常: {str(e)}")
-        return float('inf')
+        return failed
 
 
-def abaqus_objective(x, template_parser):
-    """Abaqus目标函数（被DE算法调用）"""
+def make_backend(name=SOLVER_BACKEND, node=NODE_LABEL, step=ODB_STEP, frame=ODB_FRAME):
+    """
+    按名称创建求解器后端: abaqus / fake
+    :param node: max_disp指标的默认节点
+    :param step: 提取结果的分析步
+    :param frame: 提取结果的帧
+    """
+    if name == "abaqus":
+        return AbaqusBackend(run_abaqus, extract_metrics, node, step, frame)
+    elif name == "fake":
+        return FakeAbaqusBackend(node=node, step=step, frame=frame)
+    raise ValueError(f"未知的求解器后端: {name}")
+
+
+_backend = make_backend()
+
+
+def job_work_dir(job_id):
+    """作业运行目录: 配置了临时目录且剩余空间足够时在临时目录运行，否则在结果目录中运行"""
+    if SCRATCH_DIR:
+        try:
+            os.makedirs(SCRATCH_DIR, exist_ok=True)
+            free_mb = shutil.disk_usage(SCRATCH_DIR).free / (1024 * 1024)
+            if free_mb >= SCRATCH_MIN_FREE_MB:
+                return os.path.join(SCRATCH_DIR, job_id)
+            print(f"⚠️ 临时目录剩余空间不足 ({free_mb:.0f} MB)，改在结果目录中运行")
+        except OSError as e:
+            print(f"⚠️ 临时目录不可用: {str(e)}，改在结果目录中运行")
+    return os.path.join(RESULT_DIR, job_id)
+
+
+def harvest_job(work_dir, job_dir, extensions=HARVEST_FILES, failed=False):
+    """
+    将临时目录中的指定文件拷回结果目录，然后删除临时目录
+    :param failed: 失败的作业另拷回 FAILED_JOB_KEEP 中的文件(便于排查)
+    """
+    if work_dir == job_dir or not os.path.isdir(work_dir):
+        return
+    if failed:
+        extensions = list(extensions) + list(FAILED_JOB_KEEP)
+    extensions = tuple(ext.lower() for ext in extensions)
+    try:
+        for name in os.listdir(work_dir):
+            if name.lower().endswith(extensions):
+                shutil.copy2(os.path.join(work_dir, name), os.path.join(job_dir, name))
+    except OSError as e:
+        print(f"⚠️ 拷回作业文件失败: {str(e)}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def cache_target(metric, backend):
+    """
+    缓存键中的指标名称: 包含后端的节点、分析步和帧，修改结果位置后不会命中旧的缓存
+    (非Abaqus后端的结果单独缓存，不与真实仿真结果混用)
+    """
+    target = f"{metric}@{backend.node}|step={backend.step}|frame={backend.frame}"
+    return target if backend.name == "abaqus" else f"{target}#{backend.name}"
+
+
+def evaluate_design(x, template_parser, metrics, scheduler=None, backend=None):
+    """
+    求解一个设计并提取多个指标(各指标分别缓存，全部命中时跳过仿真)
+    :param scheduler: 作业调度器 JobScheduler，None时单核运行
+    :param backend: 求解器后端 SolverBackend，None时使用配置的后端
+    :return: {指标: 数值}，失败为inf
+    """
+    backend = backend or _backend
     job_id = f"job_{int(time.time() * 1000)}_{uuid.uuid4().hex[:4]}"
     job_name = job_id
+    # 结果目录保存参数、状态和拷回的文件，求解在运行目录(可能为本地临时目录)中进行
     run_dir = os.path.join(RESULT_DIR, job_id)
+    work_dir = job_work_dir(job_id)
+    failed = {metric: float('inf') for metric in metrics}
+    info = None
 
     try:
-        # 生成INP文件
-        inp_path = template_parser.write_inp(x, run_dir, job_name)
-        print(f"📄 生成INP文件: {inp_path} | 参数: {x}")
+        # 查询评估缓存，命中则跳过仿真
+        cache_keys = {}
+        if _cache is not None:
+            with run_log.span("cache", job=job_name) as span:
+                if not template_parser.template_hash:
+                    template_parser.load_template()
+                values = template_parser.format_values(x)
+                cache_keys = {
+                    metric: _cache.make_key(template_parser.template_hash, values, cache_target(metric, backend))
+                    for metric in metrics
+                }
+                cached = {metric: _cache.get(key) for metric, key in cache_keys.items()}
+                span["hit"] = all(value is not None for value in cached.values())
+            if span["hit"]:
+                debug(f"♻️ 命中评估缓存: {cached} | 参数: {x}")
+                return cached
 
-        # 运行Abaqus
-        success, obd_path = run_abaqus(run_dir, job_name)
-        if not success or not obd_path:
+        # 生成INP文件，并记录参数以便恢复运行时复用已完成的作业
+        with run_log.span("render", job=job_name):
+            inp_path = template_parser.write_inp(x, work_dir, job_name)
+            os.makedirs(run_dir, exist_ok=True)
+            info = {"params": [float(v) for v in x], "metrics": list(metrics),
+                    "template_hash": template_parser.template_hash}
+            write_job_info(run_dir, info)
+        debug(f"📄 生成INP文件: {inp_path} | 参数: {x}")
+
+        # 运行求解器(由调度器分配CPU数)
+        with run_log.span("queue", job=job_name) as span:
+            cpus = scheduler.acquire() if scheduler is not None else 1
+            span["cpus"] = cpus
+        try:
+            with run_log.span("solve", job=job_name, cpus=cpus, backend=backend.name) as span:
+                success, result_path = backend.run_job(work_dir, job_name, cpus=cpus,
+                                                         total_time=template_parser.total_time)
+                span["success"] = bool(success and result_path)
+        finally:
+            if scheduler is not None:
+                scheduler.release(cpus)
+        if not success or not result_path:
             print(f"⚠️ 仿真失败: {job_name}")
-            return float('inf')
+            harvest_job(work_dir, run_dir, failed=True)
+            write_job_info(run_dir, dict(info, status=STATUS_FAILED))
+            return failed
 
         # 解析结果
-        result = parse_result_from_odb(obd_path)
-        print(f"📊 仿真结果: {result:.6f} | 参数: {x}")
-        return result
+        with run_log.span("extract", job=job_name):
+            results = backend.extract_metrics(result_path, metrics)
+        debug(f"📊 仿真结果: {results} | 参数: {x}")
+        all_failed = all(value == float('inf') for value in results.values())
+        with run_log.span("harvest", job=job_name):
+            harvest_job(work_dir, run_dir, failed=all_failed)
+
+        # 记录作业状态和结果，供结果保留策略排序
+        write_job_info(run_dir, dict(info, status=STATUS_FAILED if all_failed else STATUS_DONE,
+                                     results=results))
+
+        # 仅缓存有效结果，失败的设计下次仍会重新求解
+        for metric, key in cache_keys.items():
+            if results[metric] != float('inf'):
+                _cache.put(key, template_parser.template_hash, values,
+                           cache_target(metric, backend), results[metric], job_name)
+        return results
 
     except Exception as e:
         print(f"❌ 目标函数执行失败: {str(e)}")
-        return float('inf')
\ No newline at end of file
+        harvest_job(work_dir, run_dir, failed=True)
+        if info is not None:
+            write_job_info(run_dir, dict(info, status=STATUS_FAILED))
+        return failed
+
+
+def recover_finished_jobs(template_parser, metrics, backend=None):
+    """
+    恢复运行时复用结果目录中已完成但未写入缓存的作业(如中断时正在解析的作业)
+    :return: 复用的作业数
+    """
+    if _cache is None or not os.path.isdir(RESULT_DIR):
+        return 0
+    backend = backend or _backend
+    if not template_parser.template_hash:
+        template_parser.load_template()
+
+    recovered = 0
+    for job_name in sorted(os.listdir(RESULT_DIR)):
+        run_dir = os.path.join(RESULT_DIR, job_name)
+        params_path = os.path.join(run_dir, JOB_PARAMS_FILE)
+        result_path = backend.result_path(run_dir, job_name)
+        if not os.path.isfile(params_path) or not os.path.isfile(result_path):
+            continue
+        # 存在锁文件说明作业未正常结束
+        if os.path.exists(os.path.join(run_dir, f"{job_name}.lck")):
+            continue
+
+        try:
+            with open(params_path, 'r', encoding='utf-8') as f:
+                info = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if info.get("template_hash") != template_parser.template_hash:
+            continue
+
+        values = template_parser.format_values(info["params"])
+        keys = {m: _cache.make_key(template_parser.template_hash, values, cache_target(m, backend)) for m in metrics}
+        missing = [m for m, key in keys.items() if _cache.get(key) is None]
+        if not missing:
+            continue
+
+        results = backend.extract_metrics(result_path, missing)
+        for metric in missing:
+            if results[metric] != float('inf'):
+                _cache.put(keys[metric], template_parser.template_hash, values,
+                           cache_target(metric, backend), results[metric], job_name)
+        recovered += 1
+
+    # 解析服务只在主进程中用于恢复，关闭后再创建工作进程
+    if _odb_server is not None:
+        _odb_server.close()
+    if recovered:
+        print(f"♻️ 已复用 {recovered} 个已完成作业的结果")
+    return recovered
+
+
+def objective_metrics(targets=(OPTIMIZATION_TARGET,)):
+    """一次仿真需要提取的指标: 优化目标及额外指标"""
+    return list(targets) + [m for m in EXTRA_METRICS if m not in targets]
+
+
+def abaqus_objective(x, template_parser, scheduler=None, backend=None):
+    """Abaqus目标函数（被DE算法调用）"""
+    metrics = objective_metrics()
+    return evaluate_design(x, template_parser, metrics, scheduler, backend)[OPTIMIZATION_TARGET]
+
+
+def abaqus_multi_objective(x, template_parser, targets, scheduler=None, backend=None):
+    """Abaqus多目标函数: 一次仿真返回多个目标值"""
+    metrics = objective_metrics(targets)
+    results = evaluate_design(x, template_parser, metrics, scheduler, backend)
+    return [results[target] for target in targets]
@@ -0,0 +1,316 @@
+import os
+import sys
+import json
+import time
+import pickle
+import shutil
+import argparse
+import tempfile
+import numpy as np
+from config import RESULT_DIR, F, CR, INIT_METHOD, FAKE_SOLVE_LATENCY
+from de_algorithm import de
+from de_operators import STRATEGIES
+from evaluator import make_evaluator
+from template_parser import TemplateParser
+from solver_backend import FakeAbaqusBackend
+import abaqus_util
+from run_log import run_log
+from abaqus_util import JobScheduler, abaqus_objective
+
+
+class StageRecorder:
+    """记录各阶段耗时(每个工作进程写入各自的JSON行文件，结束后汇总)"""
+
+    def __init__(self, log_dir):
+        self.log_dir = log_dir
+
+    def record(self, stage, start, end, **extra):
+        path = os.path.join(self.log_dir, f"stages_{os.getpid()}.jsonl")
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps({"stage": stage, "start": start, "end": end, **extra}) + "\n")
+
+    def load(self):
+        records = []
+        for name in os.listdir(self.log_dir):
+            if name.startswith("stages_"):
+                with open(os.path.join(self.log_dir, name), 'r', encoding='utf-8') as f:
+                    records.extend(json.loads(line) for line in f)
+        return records
+
+
+def sphere(x):
+    return float(np.sum(np.square(x)))
+
+
+def rastrigin(x):
+    x = np.asarray(x, dtype=float)
+    return float(10 * len(x) + np.sum(x ** 2 - 10 * np.cos(2 * np.pi * x)))
+
+
+SYNTHETIC_FUNCTIONS = {"sphere": sphere, "rastrigin": rastrigin}
+
+
+class SyntheticObjective:
+    """合成目标函数: 解析计算目标值，并按设定耗时模拟求解"""
+
+    def __init__(self, function, latency, recorder):
+        self.function = function
+        self.latency = latency
+        self.recorder = recorder
+
+    def __call__(self, x):
+        start = time.time()
+        if self.latency:
+            time.sleep(self.latency)
+        value = SYNTHETIC_FUNCTIONS[self.function](x)
+        self.recorder.record("objective", start, time.time())
+        return value
+
+
+class TimedTemplateParser(TemplateParser):
+    """记录INP生成耗时的模板解析器"""
+
+    def __init__(self, recorder):
+        super().__init__()
+        self.recorder = recorder
+
+    def write_inp(self, parameters, job_dir, job_name):
+        start = time.time()
+        inp_path = super().write_inp(parameters, job_dir, job_name)
+        self.recorder.record("render", start, time.time())
+        return inp_path
+
+
+class TimedScheduler(JobScheduler):
+    """记录等待CPU/许可证资源耗时的作业调度器"""
+
+    def __init__(self, recorder, **kwargs):
+        super().__init__(**kwargs)
+        self.recorder = recorder
+
+    def acquire(self):
+        start = time.time()
+        cpus = super().acquire()
+        self.recorder.record("queue", start, time.time())
+        return cpus
+
+
+class TimedBackend(FakeAbaqusBackend):
+    """记录求解和结果提取耗时的本地替代求解器"""
+
+    def __init__(self, recorder, latency):
+        super().__init__(latency=latency)
+        self.recorder = recorder
+
+    def run_job(self, run_dir, job_name, cpus=1, total_time=None):
+        start = time.time()
+        result = super().run_job(run_dir, job_name, cpus, total_time)
+        self.recorder.record("solve", start, time.time(), cpus=cpus)
+        return result
+
+    def extract_metrics(self, result_path, metrics):
+        start = time.time()
+        results = super().extract_metrics(result_path, metrics)
+        self.recorder.record("extract", start, time.time())
+        return results
+
+
+class PipelineObjective:
+    """完整评估流程(INP生成 → 调度 → 本地替代求解 → 结果提取)"""
+
+    def __init__(self, template_parser, scheduler, backend, recorder):
+        self.template_parser = template_parser
+        self.scheduler = scheduler
+        self.backend = backend
+        self.recorder = recorder
+
+    def __call__(self, x):
+        start = time.time()
+        value = abaqus_objective(x, self.template_parser, self.scheduler, self.backend)
+        self.recorder.record("objective", start, time.time())
+        return value
+
+
+class _Noop:
+    """携带目标函数但不执行，用于测量进程池启动和反序列化开销"""
+
+    def __init__(self, payload):
+        self.payload = payload
+
+    def __call__(self, x):
+        return 0.0
+
+
+class QuietOutput:
+    """将标准输出(包括工作进程的输出)重定向到空设备"""
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self._saved = None
+
+    def __enter__(self):
+        if self.enabled:
+            sys.stdout.flush()
+            self._saved = os.dup(1)
+            devnull = os.open(os.devnull, os.O_WRONLY)
+            os.dup2(devnull, 1)
+            os.close(devnull)
+        return self
+
+    def __exit__(self, *exc):
+        if self._saved is not None:
+            sys.stdout.flush()
+            os.dup2(self._saved, 1)
+            os.close(self._saved)
+            self._saved = None
+
+
+def measure_startup(objective, workers):
+    """进程池启动及目标函数反序列化耗时(每个工作进程执行一次空任务)"""
+    start = time.time()
+    with make_evaluator(_Noop(objective), workers > 1, workers) as evaluator:
+        evaluator.map([[0.0]] * workers)
+    return time.time() - start
+
+
+def summarize_stages(records, wall, workers, total_cpus):
+    """汇总各阶段耗时: 平均值、P95、总耗时及核利用率"""
+    stages = {}
+    for stage in sorted({r["stage"] for r in records}):
+        durations = np.array([r["end"] - r["start"] for r in records if r["stage"] == stage])
+        stages[stage] = {
+            "count": int(len(durations)),
+            "mean_ms": float(durations.mean() * 1000),
+            "p95_ms": float(np.percentile(durations, 95) * 1000),
+            "total_s": float(durations.sum()),
+        }
+
+    busy = stages.get("objective", {}).get("total_s", 0.0)
+    solve_core_seconds = sum((r["end"] - r["start"]) * r.get("cpus", 1)
+                             for r in records if r["stage"] == "solve")
+    return stages, {
+        "worker_utilisation": busy / (wall * workers) if wall else 0.0,
+        "core_utilisation": (solve_core_seconds or busy) / (wall * total_cpus) if wall else 0.0,
+    }
+
+
+def run_case(mode, pop_size, dim, workers, gens, latency, function, seed, strategy="rand/1",
+             adaptation=None):
+    """运行一组配置并返回测量结果"""
+    log_dir = tempfile.mkdtemp(prefix="bench_")
+    recorder = StageRecorder(log_dir)
+
+    if mode == "synthetic":
+        objective = SyntheticObjective(function, latency, recorder)
+        bounds = [(-5.0, 5.0)] * dim
+        total_cpus = workers
+    else:
+        template_parser = TimedTemplateParser(recorder)
+        template_parser.load_template()
+        scheduler = TimedScheduler(recorder, total_cpus=workers, max_jobs=workers)
+        workers = scheduler.max_jobs
+        total_cpus = scheduler.total_cpus
+        objective = PipelineObjective(template_parser, scheduler, TimedBackend(recorder, latency), recorder)
+        bounds = [(0.0, 5.0)] * template_parser.get_parameters_count()
+        dim = len(bounds)
+
+    # 调度器的共享锁只能通过进程继承传递，不计入序列化开销
+    payload = objective if mode == "synthetic" else (objective.template_parser, objective.backend)
+    pickle_start = time.time()
+    payload_bytes = len(pickle.dumps(payload))
+    pickle_ms = (time.time() - pickle_start) * 1000
+
+    existing_jobs = set(os.listdir(RESULT_DIR)) if os.path.isdir(RESULT_DIR) else set()
+    try:
+        startup = measure_startup(objective, workers)
+        start = time.time()
+        _, best = de(objective, bounds, pop_size=pop_size, gens=gens, F=F, CR=CR,
+                     parallel=workers > 1, init_method=INIT_METHOD, max_workers=workers,
+                     strategy=strategy, adaptation=adaptation, seed=seed)
+        wall = time.time() - start
+        records = [r for r in recorder.load() if r["start"] >= start]
+    finally:
+        shutil.rmtree(log_dir, ignore_errors=True)
+        # 删除本次测量产生的作业目录
+        if mode == "fake" and os.path.isdir(RESULT_DIR):
+            for name in set(os.listdir(RESULT_DIR)) - existing_jobs:
+                if name.startswith("job_"):
+                    shutil.rmtree(os.path.join(RESULT_DIR, name), ignore_errors=True)
+
+    stages, utilisation = summarize_stages(records, wall, workers, total_cpus)
+    evaluations = stages.get("objective", {}).get("count", 0)
+    return {
+        "mode": mode, "pop_size": pop_size, "dim": dim, "workers": workers, "gens": gens,
+        "latency_s": latency, "evaluations": evaluations, "wall_s": wall,
+        "evals_per_s": evaluations / wall if wall else 0.0,
+        "startup_s": startup, "payload_bytes": payload_bytes, "pickle_ms": pickle_ms,
+        "best": float(best), "stages": stages, **utilisation,
+    }
+
+
+def print_report(results):
+    """以表格形式输出测量结果"""
+    print(f"{'mode':<10}{'pop':>5}{'dim':>5}{'cpu':>5}{'evals':>7}{'wall(s)':>9}{'evals/s':>9}"
+          f"{'util':>7}{'core':>7}{'start(s)':>10}{'payload':>9}")
+    for r in results:
+        print(f"{r['mode']:<10}{r['pop_size']:>5}{r['dim']:>5}{r['workers']:>5}{r['evaluations']:>7}"
+              f"{r['wall_s']:>9.2f}{r['evals_per_s']:>9.2f}{r['worker_utilisation']:>7.0%}"
+              f"{r['core_utilisation']:>7.0%}{r['startup_s']:>10.2f}{r['payload_bytes']:>9}")
+        stages = "  ".join(f"{name} {s['mean_ms']:.1f}/{s['p95_ms']:.1f}ms"
+                           for name, s in r["stages"].items())
+        print(f"    阶段耗时(平均/P95): {stages}")
+
+
+def parse_int_list(text):
+    return [int(v) for v in text.split(',') if v]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="优化流程开销与吞吐量测量")
+    parser.add_argument("--mode", choices=["synthetic", "fake", "all"], default="all",
+                        help="synthetic: 合成目标函数; fake: 本地替代求解器完整流程")
+    parser.add_argument("--pop", type=parse_int_list, default=[8, 16], help="种群大小列表，如 8,16")
+    parser.add_argument("--dims", type=parse_int_list, default=[2, 8],
+                        help="维数列表(仅synthetic模式，fake模式使用模板参数数)")
+    parser.add_argument("--workers", type=parse_int_list, default=[1, 4], help="并行进程数列表")
+    parser.add_argument("--gens", type=int, default=3, help="迭代次数")
+    parser.add_argument("--latency", type=float, default=FAKE_SOLVE_LATENCY, help="模拟求解耗时(秒)")
+    parser.add_argument("--function", choices=sorted(SYNTHETIC_FUNCTIONS), default="rastrigin")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--strategy", choices=sorted(STRATEGIES), default="rand/1", help="DE变异策略")
+    parser.add_argument("--adaptation", choices=["jade", "shade"], default=None, help="F/CR自适应方法")
+    parser.add_argument("--verbose", action="store_true", help="保留优化过程的控制台输出")
+    parser.add_argument("--cache", action="store_true",
+                        help="fake模式启用评估缓存(默认关闭，相同随机种子的重复设计会命中缓存)")
+    parser.add_argument("--output", help="测量结果JSON文件")
+    args = parser.parse_args(argv)
+
+    if not args.cache:
+        abaqus_util._cache = None
+    # 各阶段耗时由本脚本自行记录，不写入结果目录的运行日志
+    run_log.path = None
+
+    modes = ["synthetic", "fake"] if args.mode == "all" else [args.mode]
+    results = []
+    for mode in modes:
+        dims = args.dims if mode == "synthetic" else [None]
+        for pop_size in args.pop:
+            for dim in dims:
+                for workers in args.workers:
+                    with QuietOutput(not args.verbose):
+                        results.append(run_case(mode, pop_size, dim, workers, args.gens, args.latency,
+                                                args.function, args.seed, args.strategy, args.adaptation))
+                    print(f"✅ {mode} pop={pop_size} dim={results[-1]['dim']} workers={workers}: "
+                          f"{results[-1]['evals_per_s']:.2f} evals/s")
+
+    print()
+    print_report(results)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"💾 测量结果已保存: {args.output}")
+    return results
+
+
+if __name__ == "__main__":
+    main()
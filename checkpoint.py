@@ -0,0 +1,50 @@
+import os
+import pickle
+import random
+import numpy as np
+from config import CHECKPOINT_PATH
+from run_log import log
+
+
+class Checkpointer:
+    """优化过程检查点: 定期保存种群、适应度、最优个体、随机数状态和进度"""
+
+    def __init__(self, path=CHECKPOINT_PATH, every=1, meta=None):
+        """
+        :param path: 检查点文件路径
+        :param every: 每隔多少代(异步模式下为 pop_size 次评估)保存一次
+        :param meta: 随检查点一起保存的附加信息(如模板哈希)
+        """
+        self.path = path
+        self.every = max(1, int(every))
+        self.meta = meta or {}
+
+    def save(self, state):
+        """原子写入检查点(先写临时文件再替换，避免中断时损坏)"""
+        state = dict(self.meta, **state)
+        state["random_state"] = random.getstate()
+        state["np_random_state"] = np.random.get_state()
+
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(state, f)
+        os.replace(tmp_path, self.path)
+
+    def maybe_save(self, gen, state):
+        """第gen代结束时按间隔保存"""
+        if gen % self.every == 0:
+            self.save(state)
+            log(f"💾 已保存检查点: 第 {gen} 代")
+
+
+def load_checkpoint(path=CHECKPOINT_PATH):
+    """加载检查点并恢复随机数状态，文件不存在返回None"""
+    if not os.path.exists(path):
+        return None
+
+    with open(path, 'rb') as f:
+        state = pickle.load(f)
+    random.setstate(state["random_state"])
+    np.random.set_state(state["np_random_state"])
+    return state
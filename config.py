@@ -3,13 +3,25 @@ import os
 # ================ 文件配置 ================
 ORIGINAL_INP = "try.inp"            # 原始INP文件(从Abaqus CAE生成)
 TEMPLATE_FILE = "template.inp"        # 生成的模板文件
+PARAM_SPEC_FILE = None                # 参数说明文件(如 "param_spec.json")，设置后不进入交互式编辑
+DEFAULT_PARAM_FORMAT = ".6f"          # 参数写入INP的默认格式
+PARAM_FORMATS = {}                    # 各参数的写入格式, 如 {"x1": ".3f", "x2": ".4e"}
+SPLIT_INCLUDE = True                  # 静态部分拆分为共享的*INCLUDE文件，每个作业只写参数化部分
+INCLUDE_MIN_BYTES = 64 * 1024         # 小于该大小的静态段仍直接写入作业INP
+STATIC_DIR_NAME = "_static"           # 共享静态文件目录(位于结果目录)
 
 # ================ 优化配置 ================
 # 边界配置将在模板创建后更新
 BOUNDS = []  # 初始为空，模板创建后更新
-OPTIMIZATION_TARGET = "max_disp"    # 优化目标: max_stress/max_disp
+OPTIMIZATION_TARGET = "max_disp"    # 优化目标: max_stress/max_disp (其他指标见 parse_odb.compute_metric)
 OPTIMIZATION_DIRECTION = "min"        # 优化方向: min/max
 NODE_LABEL = 2                        # 位移分析节点
+MULTI_OBJECTIVE = False               # 多目标优化(输出Pareto前沿)
+OBJECTIVES = ["max_disp", "max_stress"]   # 多目标优化的目标
+OBJECTIVE_DIRECTIONS = ["min", "min"]     # 各目标的优化方向
+EXTRA_METRICS = []                    # 同一次ODB解析中额外提取的指标, 如 ["max_stress", "rf:FIX_XY"]
+ODB_STEP = None                       # 结果分析步(名称或序号), None为第一个分析步
+ODB_FRAME = -1                        # 结果帧序号, -1为最后一帧
 
 # ================ DE算法配置 ================
 POP_SIZE = 4                          # 种群大小
@@ -17,16 +29,105 @@ GENERATIONS = 4                      # 迭代次数
 F = 0.5                               # 缩放因子
 CR = 0.9                              # 交叉概率
 PARALLEL = True                       # 并行计算
-MAX_CPU = 4                           # 最大并行进程数
+MAX_CPU = 4                           # 最大并行进程数(最大并发作业数)
+INIT_METHOD = "lhs"                   # 初始化方式: random/lhs/sobol
+ASYNC_DE = False                      # 异步(稳态)DE: 不等待整代评估完成
+DE_STRATEGY = "rand/1"                # 变异策略: rand/1 / best/1 / current-to-best/1 / rand/2
+ADAPTATION = None                     # F/CR自适应: None / "jade" / "shade" (F、CR作为初始均值)
+BOUND_HANDLING = "reflect"            # 越界处理: reflect(反射) / clip(截断)
+DE_SEED = None                        # 随机数种子, 固定后结果可复现
+
+# ================ 停止条件配置 ================
+DIVERSITY_TOL = 1e-4                  # 种群多样性(各维标准差/参数范围的均值)低于该值时停止, None为不检查
+SPREAD_TOL = 1e-8                     # 种群适应度最大最小值之差(相对最优值)低于该值时停止, None为不检查
+STAGNATION_GENS = 10                  # 连续多少代最优值无明显改进时停止, None为不检查
+STAGNATION_TOL = 1e-6                 # 停滞判定的相对改进量
+MAX_EVALUATIONS = None                # 真实评估(仿真)次数上限(粗网格评估另见MAX_COARSE_EVALUATIONS), None为不限制
+MAX_WALL_TIME = None                  # 运行时间上限(秒), None为不限制
+MAX_COARSE_EVALUATIONS = None         # 多保真度粗网格评估次数上限(不计入MAX_EVALUATIONS), None为不限制
+RESTARTS = 0                          # 收敛后的最大重启次数(IPOP: 每次重启增大种群), 0为不重启
+RESTART_POP_FACTOR = 2                # 每次重启种群规模的放大倍数
+
+# ================ 代理模型配置 ================
+SURROGATE = False                     # 启用RBF代理模型预筛选试验向量
+SURROGATE_CANDIDATES = 4              # 每个个体生成的候选试验向量数
+SURROGATE_EVAL_FRACTION = 0.5         # 每代真实评估的比例
+SURROGATE_REFIT_EVERY = 1             # 每隔多少代重新拟合
+SURROGATE_TRUST = 0.3                 # 预测秩相关系数低于该值时下一代全部真实评估
+SURROGATE_MAX_SAMPLES = 200           # 拟合样本上限(保留最好的一半和最近的样本)
+
+# ================ 多保真度配置 ================
+COARSE_TEMPLATE_FILE = None           # 粗网格模板(参数与TEMPLATE_FILE相同), 设置后试验向量先在粗网格上筛选
+PROMOTE_FRACTION = 0.3                # 每代提升到细网格评估的试验向量比例
+FIDELITY_TRUST = 0.5                  # 粗/细网格秩相关系数低于该值时下一代全部细网格评估
+FIDELITY_CONTROL = 2                  # 每代额外随机提升的对照试验向量数(用于无偏地计算秩相关系数)
+FIDELITY_WINDOW = 30                  # 秩相关系数按最近多少个对照样本计算(跨代累积)
 
 # ================ ABAQUS配置 ================
+SOLVER_BACKEND = "abaqus"             # 求解器后端: abaqus / fake(本地替代求解器，无需许可证)
 ABAQUS_COMMAND = "abaqus"             # Abaqus命令
 ABAQUS_TIMEOUT = 120                  # 运行超时(秒)
+TOTAL_CPUS = None                     # 可用于Abaqus的总核数, None为本机全部核数
+CPUS_PER_JOB = "auto"                 # 每个作业的CPU数, "auto"按吞吐量模型自动选择
+LICENSE_TOKENS = None                 # 许可证令牌预算, None为不限制
+JOB_MEMORY_MB = None                  # 每个作业预计内存(MB), None为不限制
+PARALLEL_FRACTION = 0.7               # 单作业多核加速的可并行比例(Amdahl模型)
+ODB_SERVER = True                     # 常驻ODB解析服务(每个工作进程启动一次abaqus python)
+ODB_PARSE_TIMEOUT = 60                # ODB解析超时(秒)
 BASE_DIR = "result"                   # 结果目录
+SCRATCH_DIR = None                    # 作业运行的本地临时目录(如 "/dev/shm/abaqus_opt" 或本地NVMe), None为在结果目录中运行
+SCRATCH_MIN_FREE_MB = 1024            # 临时目录剩余空间低于该值时改在结果目录中运行
+HARVEST_FILES = [".inp", ".msg", ".dat", ".sta", ".log"]   # 从临时目录拷回结果目录的文件(失败作业另拷回FAILED_JOB_KEEP); 恢复运行时复用已完成作业需要".odb"
+FAKE_SOLVE_LATENCY = 1.0              # 本地替代求解器模拟的单核求解耗时(秒)
+FAKE_LATENCY_JITTER = 0.0             # 模拟耗时的相对随机波动(0.2为±20%)
+
+# ================ 作业监控配置 ================
+JOB_MONITOR = True                    # 运行中监视.sta/.msg，不收敛的作业提前终止
+MONITOR_INTERVAL = 2.0                # 检查间隔(秒)
+MAX_CUTBACKS = 10                     # 最近CUTBACK_WINDOW次尝试中削减次数超过该值时终止, None为不检查
+CUTBACK_WINDOW = 20                   # 统计削减次数的尝试窗口(.sta中的行数)
+MAX_ATTEMPTS = 4                      # 单个增量步不收敛尝试超过该次数时终止(用于*CONTROLS放宽了Abaqus默认的5次), None为不检查
+MIN_TIME_INCREMENT = None             # 增量步时间下限(如 1e-6), None为不检查
+PROJECTION_MARGIN = 1.5               # 按进度预计的总耗时超过 超时时间*该倍数 时终止, None为不检查
+MONITOR_GRACE = 10                    # 作业启动后多少秒内不做耗时预测
+
+# ================ 分布式配置 ================
+DISTRIBUTED = False                   # 协调节点模式: 评估由其他主机上的工作节点执行(python distributed.py --host 协调节点地址)
+DIST_ADDRESS = ("127.0.0.1", 6000)    # 协调节点监听地址(改为本机在内网中的地址供其他主机连接，不建议0.0.0.0)
+DIST_AUTHKEY = os.environ.get("ABAQUS_OPT_AUTHKEY")   # 连接认证密钥，只从环境变量读取(各节点须一致，未设置时不能启动分布式模式)
+DIST_HANDSHAKE_TIMEOUT = 10           # 连接认证超时(秒)
+DIST_MIN_AGENTS = 1                   # 开始优化前至少等待连接的工作节点数
+HEARTBEAT_INTERVAL = 5                # 工作节点心跳间隔(秒)
+HEARTBEAT_TIMEOUT = 30                # 超过该时间未收到心跳视为节点失联，其作业重新排队(秒)
+AGENT_RECONNECT = 10                  # 工作节点重连间隔(秒)
+
+# ================ 缓存配置 ================
+CACHE_ENABLED = True                  # 启用评估缓存(跨运行复用已求解的设计)
+CACHE_FILE = "eval_cache.sqlite"      # 缓存文件名(位于结果目录)
+
+# ================ 检查点配置 ================
+CHECKPOINT_FILE = "checkpoint.pkl"    # 检查点文件名(位于结果目录)
+CHECKPOINT_EVERY = 1                  # 每隔多少代保存一次检查点
+JOB_PARAMS_FILE = "params.json"       # 作业目录中记录参数的文件
+
+# ================ 结果保留配置 ================
+RETENTION_ENABLED = True              # 后台清理非最优作业的结果文件(防止磁盘写满)
+KEEP_TOP_K = 5                        # 保留全部文件的最优作业数
+RETENTION_ACTION = "delete"           # 非最优作业的处理方式: delete(删除)/compress(压缩为zip)
+RETENTION_INTERVAL = 30               # 后台清理间隔(秒)
+FAILED_JOB_KEEP = [".inp", ".msg", ".dat", ".sta", ".log"]   # 失败作业保留的文件(便于排查)
+
+# ================ 日志配置 ================
+VERBOSITY = 1                         # 控制台输出级别: 0仅错误/1每代进度/2每个作业详细信息
+RUN_LOG_ENABLED = True                # 记录结构化运行日志(各阶段耗时)
+RUN_LOG_FILE = "run_log.jsonl"        # 运行日志文件名(位于结果目录)
 
 # ================ 自动配置 ================
 PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
 RESULT_DIR = os.path.join(PROJECT_ROOT, BASE_DIR)
+CACHE_PATH = os.path.join(RESULT_DIR, CACHE_FILE)
+CHECKPOINT_PATH = os.path.join(RESULT_DIR, CHECKPOINT_FILE)
+RUN_LOG_PATH = os.path.join(RESULT_DIR, RUN_LOG_FILE)
 
 
 def update_bounds(new_bounds):
@@ -1,111 +1,415 @@
+import time
+import contextlib
 import numpy as np
-import random
 import concurrent.futures
 from config import MAX_CPU
-import multiprocessing as mp
+from evaluator import make_evaluator
+from de_operators import TrialGenerator, make_rng
+from stopping import ConvergenceMonitor, BUDGET_REASONS
+from run_log import run_log, log
 
 
-def evaluate_individual(objective_func, ind):
-    """用于并行评估的辅助函数"""
-    return objective_func(ind)
+def init_population(bounds, pop_size, method="random", rng=None):
+    """
+    生成初始种群
+    :param bounds: 参数边界 [(min, max), ...]
+    :param pop_size: 种群大小
+    :param method: 初始化方式 random/lhs/sobol
+    :param rng: 随机数生成器 np.random.Generator
+    :return: 种群数组 (pop_size, dim)
+    """
+    rng = rng if rng is not None else make_rng()
+    dim = len(bounds)
+    lower = np.array([b[0] for b in bounds], dtype=float)
+    upper = np.array([b[1] for b in bounds], dtype=float)
+
+    if method == "lhs":
+        # 拉丁超立方: 每一维划分为pop_size个等概率区间，每个区间恰好一个样本
+        strata = np.argsort(rng.random((pop_size, dim)), axis=0)
+        unit = (strata + rng.random((pop_size, dim))) / pop_size
+    elif method == "sobol":
+        try:
+            from scipy.stats import qmc
+        except ImportError:
+            print("⚠️ 未安装scipy，Sobol初始化回退为拉丁超立方")
+            return init_population(bounds, pop_size, "lhs", rng)
+        # Sobol序列的均衡性要求样本数为2的幂: 生成不少于pop_size的2^m个点后取前pop_size个
+        m = int(np.ceil(np.log2(max(1, pop_size))))
+        unit = qmc.Sobol(d=dim, scramble=True, seed=rng).random_base2(m=m)[:pop_size]
+    else:
+        if method != "random":
+            print(f"⚠️ 未知初始化方式: {method}，使用随机初始化")
+        unit = rng.random((pop_size, dim))
 
+    return lower + unit * (upper - lower)
 
-def de(objective_func, bounds, pop_size=10, gens=20, F=0.5, CR=0.9, parallel=False):
+
+def de(objective_func, bounds, pop_size=10, gens=20, F=0.5, CR=0.9, parallel=False,
+       init_method="random", asynchronous=False, surrogate=None, checkpointer=None,
+       resume_state=None, max_workers=MAX_CPU, strategy="rand/1", adaptation=None,
+       bound_handling="reflect", seed=None, monitor=None, restarts=0, restart_factor=2,
+       distributed=False, fidelity=None):
     """
     差分进化算法
     :param objective_func: 目标函数
     :param bounds: 参数边界 [(min, max), ...]
     :param pop_size: 种群大小
-    :param gens: 迭代次数
-    :param F: 缩放因子
-    :param CR: 交叉概率
+    :param gens: 迭代次数(每次重启各自计数)
+    :param F: 缩放因子(启用自适应时为初始均值)
+    :param CR: 交叉概率(启用自适应时为初始均值)
     :param parallel: 是否并行
+    :param init_method: 初始化方式 random/lhs/sobol
+    :param asynchronous: 异步(稳态)模式，任一评估完成即进行选择并提交新试验向量
+    :param surrogate: 代理模型预筛选器 SurrogateScreen (仅同步模式)
+    :param checkpointer: 检查点保存器 Checkpointer
+    :param resume_state: 从检查点恢复的状态(load_checkpoint的返回值)
+    :param max_workers: 并行评估进程数
+    :param strategy: 变异策略 rand/1 / best/1 / current-to-best/1 / rand/2
+    :param adaptation: F/CR自适应方法 None/jade/shade
+    :param bound_handling: 边界处理方式 reflect(反射)/clip(截断)
+    :param seed: 随机数种子(None为不固定)
+    :param monitor: 收敛检测与计算预算 ConvergenceMonitor，None为只按迭代次数停止
+    :param restarts: 收敛(非预算用完)后的最大重启次数
+    :param restart_factor: 每次重启种群规模的放大倍数(IPOP)
+    :param distributed: 由远程工作节点评估(DistributedEvaluator)
+    :param fidelity: 多保真度筛选器 MultiFidelityScreen (仅同步模式，粗网格在本机评估)
     :return: (最优解, 最优值)
     """
-    dim = len(bounds)
-    pop = np.zeros((pop_size, dim))
-    fitness = np.zeros(pop_size)
+    generator = TrialGenerator(bounds, F, CR, strategy, adaptation, bound_handling, seed)
+    if resume_state is not None and resume_state.get("generator") is not None:
+        # 恢复随机数生成器和自适应参数，保证恢复后的运行与不中断时一致
+        generator = resume_state["generator"]
+    if pop_size < generator.min_pop_size():
+        raise ValueError(f"变异策略 {generator.strategy} 至少需要 {generator.min_pop_size()} 个个体")
+    monitor = monitor if monitor is not None else ConvergenceMonitor()
+
+    # 评估器在整个优化过程中只创建一次
+    with contextlib.ExitStack() as stack:
+        evaluator = stack.enter_context(make_evaluator(objective_func, parallel, max_workers, distributed))
+        coarse_evaluator = None
+        if fidelity is not None and not asynchronous:
+            coarse_evaluator = stack.enter_context(make_evaluator(fidelity.objective, parallel, max_workers))
+
+        if resume_state is not None:
+            # 从检查点恢复种群和进度
+            pop = np.array(resume_state["pop"], dtype=float)
+            fitness = np.array(resume_state["fitness"], dtype=float)
+            if surrogate is not None and resume_state.get("surrogate") is not None:
+                # 沿用检查点中的样本库，样本上限以当前配置为准
+                max_samples = surrogate.max_samples
+                surrogate = resume_state["surrogate"]
+                surrogate.max_samples = max_samples
+                surrogate._trim()
+            if resume_state.get("monitor") is not None:
+                monitor.restore(resume_state["monitor"])
+            log(f"♻️ 从检查点恢复: 第 {resume_state['gen']} 代"
+                + (f" (第 {monitor.restarts} 次重启)" if monitor.restarts else ""))
+        else:
+            # 初始化种群(与试验种群走相同的并行评估路径)
+            pop, fitness = _initial_population(evaluator, bounds, pop_size, init_method, generator,
+                                               parallel, surrogate, monitor)
+            resume_state = {"gen": 0, "completed": 0}
+            if checkpointer is not None:
+                checkpointer.save(_checkpoint_state(bounds, pop, fitness, 0, 0, generator, surrogate, monitor))
+
+        log(f"🧬 变异策略: {generator.describe()}")
+        if asynchronous and surrogate is not None:
+            print("⚠️ 异步模式不支持代理模型预筛选，已忽略")
+        if asynchronous and fidelity is not None:
+            print("⚠️ 异步模式不支持多保真度筛选，已忽略")
+        start_gen = resume_state["gen"]
+        completed = resume_state.get("completed", start_gen * len(pop))
+
+        while True:
+            if asynchronous:
+                best_individual, best_fitness, reason = _de_async_loop(
+                    evaluator, pop, fitness, generator, gens, completed, checkpointer, monitor)
+            else:
+                best_individual, best_fitness, reason = _de_loop(
+                    evaluator, pop, fitness, generator, gens, parallel, surrogate, start_gen,
+                    checkpointer, monitor, fidelity, coarse_evaluator)
+
+            # 收敛后按更大的种群重启(IPOP)，预算用完时直接结束
+            new_size = int(round(len(pop) * restart_factor))
+            remaining = monitor.remaining_evaluations()
+            if (reason is None or reason in BUDGET_REASONS or monitor.restarts >= restarts
+                    or (remaining is not None and remaining < new_size - 1)):
+                break
+
+            monitor.start_restart()
+            log(f"\n🔁 第 {monitor.restarts}/{restarts} 次重启 ({reason})，种群规模 {len(pop)} → {new_size}")
+            run_log.event("restart", restart=monitor.restarts, reason=reason, pop_size=new_size,
+                          best=float(best_fitness), evaluations=monitor.evaluations)
+            # 新种群保留全局最优个体(不重复评估)
+            pop, fitness = _initial_population(evaluator, bounds, new_size, init_method, generator,
+                                               parallel, surrogate, monitor, (best_individual, best_fitness))
+            start_gen, completed = 0, 0
+            if checkpointer is not None:
+                checkpointer.save(_checkpoint_state(bounds, pop, fitness, 0, 0, generator, surrogate, monitor))
+
+        if reason is not None:
+            log(f"🛑 提前停止: {reason} (共 {monitor.evaluations} 次评估, {monitor.wall_time():.0f} 秒)")
+        run_log.event("stop", reason=reason or "generations", best=float(best_fitness),
+                      evaluations=monitor.evaluations, coarse_evaluations=monitor.coarse_evaluations,
+                      restarts=monitor.restarts, wall_time=monitor.wall_time())
+        return best_individual, best_fitness
 
-    # 初始化种群
-    for i in range(pop_size):
-        for d in range(dim):
-            pop[i, d] = random.uniform(bounds[d][0], bounds[d][1])
-        fitness[i] = objective_func(pop[i])
+
+def _initial_population(evaluator, bounds, pop_size, init_method, generator, parallel, surrogate,
+                        monitor, elite=None):
+    """
+    生成并评估初始种群
+    :param elite: 保留到新种群中的已评估个体 (x, f)，重启时使用
+    :return: (种群, 适应度)
+    """
+    pop = init_population(bounds, pop_size, init_method, generator.rng)
+    fitness = np.empty(pop_size)
+    start = 0
+    if elite is not None:
+        pop[0], fitness[0] = elite
+        start = 1
+    if parallel:
+        log(f"⚙️ 并行评估初始种群 ({evaluator.max_workers}进程)")
+    with run_log.span("evaluate", gen=0, count=pop_size - start, restart=monitor.restarts):
+        fitness[start:] = evaluator.map(list(pop[start:]))
+    monitor.add_evaluations(pop_size - start)
+    if surrogate is not None:
+        surrogate.record(pop[start:], fitness[start:])
+    return pop, fitness
+
+
+def _checkpoint_state(bounds, pop, fitness, gen, completed, generator, surrogate=None, monitor=None):
+    """组装检查点状态"""
+    best_idx = np.argmin(fitness)
+    return {
+        "bounds": list(bounds),
+        "pop": pop.copy(),
+        "fitness": fitness.copy(),
+        "best_individual": pop[best_idx].copy(),
+        "best_fitness": float(fitness[best_idx]),
+        "gen": gen,
+        "completed": completed,
+        "generator": generator,
+        "surrogate": surrogate,
+        "monitor": monitor
+    }
+
+
+def _select(pop, fitness, trial_pop, trial_fitness):
+    """
+    一对一选择(整个种群一次完成)
+    :return: (改进标记, 改进量)
+    """
+    improved = trial_fitness < fitness
+    improvement = np.zeros(len(fitness))
+    improvement[improved] = fitness[improved] - trial_fitness[improved]
+    pop[improved] = trial_pop[improved]
+    fitness[improved] = trial_fitness[improved]
+    return improved, improvement
+
+
+def _de_loop(evaluator, pop, fitness, generator, gens, parallel, surrogate=None,
+             start_gen=0, checkpointer=None, monitor=None, fidelity=None, coarse_evaluator=None):
+    """
+    差分进化主循环(按代同步)
+    :return: (最优解, 最优值, 提前停止原因或None)
+    """
+    monitor = monitor if monitor is not None else ConvergenceMonitor()
+    pop_size = len(pop)
+    bounds = generator.bounds
 
     # 记录最佳个体
     best_idx = np.argmin(fitness)
     best_fitness = fitness[best_idx]
     best_individual = pop[best_idx].copy()
 
-    print(f"🎯 初始最优值: {best_fitness:.6f}")
+    log(f"🎯 初始最优值: {best_fitness:.6f}")
 
     # 进化循环
-    for gen in range(gens):
-        print(f"\n📘 Generation {gen + 1}/{gens}")
-
-        trial_pop = []
-        for i in range(pop_size):
-            # 选择三个不同的个体
-            idxs = [idx for idx in range(pop_size) if idx != i]
-            a, b, c = pop[random.sample(idxs, 3)]
-
-            # 变异操作
-            mutant = a + F * (b - c)
-
-            # 边界处理
-            for d in range(dim):
-                mutant[d] = max(bounds[d][0], min(bounds[d][1], mutant[d]))
-
-            # 交叉操作
-            trial = pop[i].copy()
-            cross_points = np.random.rand(dim) < CR
-            if not np.any(cross_points):
-                cross_points[random.randint(0, dim - 1)] = True
-            trial[cross_points] = mutant[cross_points]
-            trial_pop.append(trial)
-
-        # # 评估试验种群
-        # if parallel:
-        #     print(f"⚙️ 并行评估 ({MAX_CPU}进程)")
-        #     try:
-        #         with concurrent.futures.ProcessPoolExecutor(max_workers=MAX_CPU) as executor:
-        #             trial_fitness = list(executor.map(objective_func, trial_pop))
-        #     except Exception as e:
-        #         print(f"⚠️ 并行评估出错: {str(e)}")
-        #         trial_fitness = [objective_func(ind) for ind in trial_pop]
-        # else:
-        #     trial_fitness = [objective_func(ind) for ind in trial_pop]
-        # 评估试验种群
+    reason = None
+    for gen in range(start_gen, gens):
+        # 恢复运行时预算可能已经用完
+        reason = monitor.budget_reason()
+        if reason is not None:
+            break
+        log(f"\n📘 Generation {gen + 1}/{gens}")
+        gen_start = time.time()
+
+        # 每个目标个体本代使用的F和CR(代理模型的多个候选共用)
+        F, CR = generator.sample_parameters(pop_size)
+
+        def make_trials(p):
+            return generator.generate(p, fitness, F=F, CR=CR)[0]
+
+        if surrogate is not None:
+            # 代理模型预筛选，只对最有希望的试验向量运行仿真
+            trial_pop, eval_idx, predicted = surrogate.screen(pop, fitness, bounds, make_trials, gen)
+        else:
+            trial_pop = make_trials(pop)
+            eval_idx = list(range(pop_size))
+
+        # 多保真度: 先在粗网格上评估，只有最好的一部分和少量对照样本提升到细网格
+        if fidelity is not None:
+            # 粗网格评估次数预算不足一代时只筛选前面的试验向量
+            remaining = monitor.remaining_coarse_evaluations()
+            if remaining is not None and remaining < len(eval_idx):
+                eval_idx = eval_idx[:remaining]
+            with run_log.span("evaluate_coarse", gen=gen + 1, count=len(eval_idx)):
+                coarse_values = coarse_evaluator.map(list(trial_pop[eval_idx]))
+            monitor.add_coarse_evaluations(len(eval_idx))
+            screened = len(eval_idx)
+            eval_idx, coarse_values = fidelity.promote(eval_idx, coarse_values, generator.rng)
+
+        # 评估次数预算不足一代时只评估前面的试验向量
+        remaining = monitor.remaining_evaluations()
+        if remaining is not None and remaining < len(eval_idx):
+            eval_idx = eval_idx[:remaining]
+            if fidelity is not None:
+                coarse_values = coarse_values[:remaining]
+
+        # 评估试验种群(未被选中的试验向量视为未改进)
         if parallel:
-            print(f"⚙️ 并行评估 ({MAX_CPU}进程)")
+            log(f"⚙️ 并行评估 ({evaluator.max_workers}进程)")
+        with run_log.span("evaluate", gen=gen + 1, count=len(eval_idx)):
+            evaluated = evaluator.map(list(trial_pop[eval_idx]))
+        trial_fitness = np.full(pop_size, np.inf)
+        trial_fitness[eval_idx] = evaluated
+        monitor.add_evaluations(len(eval_idx))
+
+        if surrogate is not None:
+            surrogate.record(trial_pop[eval_idx], evaluated)
+            if predicted is not None:
+                surrogate.update_trust(predicted[eval_idx], evaluated)
+            log(f"🔮 真实评估: {len(eval_idx)}/{pop_size}")
+        if fidelity is not None:
+            fidelity.update(eval_idx, coarse_values, evaluated, gen + 1)
+            log(f"🪜 细网格评估: {len(eval_idx)}/{screened}")
+
+        # 选择操作
+        improved, improvement = _select(pop, fitness, trial_pop, trial_fitness)
+        generator.update(F, CR, improvement)
+        improved_count = int(improved.sum())
+
+        # 更新全局最优
+        best_idx = np.argmin(fitness)
+        if fitness[best_idx] < best_fitness:
+            best_fitness = fitness[best_idx]
+            best_individual = pop[best_idx].copy()
+
+        # 输出当前代信息
+        log(f"🔄 改进个体: {improved_count}/{pop_size}")
+        log(f"🔥 当前最优值: {best_fitness:.6f}")
+        log(f"🧬 最优个体: {best_individual}")
+        run_log.event("generation", gen=gen + 1, best=float(best_fitness), improved=improved_count,
+                      evaluations=len(eval_idx), duration=time.time() - gen_start)
+        reason = monitor.update(pop, fitness, bounds)
+
+        if checkpointer is not None:
+            state = _checkpoint_state(bounds, pop, fitness, gen + 1, (gen + 1) * pop_size, generator,
+                                      surrogate, monitor)
+            # 提前停止时总是保存，恢复后直接结束或重启
+            if reason is not None:
+                checkpointer.save(state)
+            else:
+                checkpointer.maybe_save(gen + 1, state)
+        if reason is not None:
+            break
+
+    return best_individual, best_fitness, reason
+
+
+def _de_async_loop(evaluator, pop, fitness, generator, gens, start_completed=0, checkpointer=None,
+                   monitor=None):
+    """
+    异步(稳态)差分进化主循环
+    保持所有评估槽位始终忙碌：任一试验向量返回后立即与其目标个体比较替换，
+    并基于当前种群生成新的试验向量提交，总评估次数与同步模式相同(gens*pop_size)
+    :return: (最优解, 最优值, 提前停止原因或None)
+    """
+    monitor = monitor if monitor is not None else ConvergenceMonitor()
+    pop_size = len(pop)
+    total = gens * pop_size
+    slots = evaluator.max_workers
+
+    best_idx = np.argmin(fitness)
+    best_fitness = fitness[best_idx]
+    best_individual = pop[best_idx].copy()
+    log(f"🎯 初始最优值: {best_fitness:.6f}")
+    log(f"⚙️ 异步评估 ({slots}个并发槽位, 共{total}次评估)")
+    gen_start = time.time()
+
+    pending = {}  # future -> (目标个体序号, 试验向量, F, CR)
+    submitted = start_completed
+    completed = start_completed
+    improved_count = 0
+    # 每pop_size次评估(相当于一代)汇总一次F/CR自适应
+    used_F, used_CR, improvements = [], [], []
+    reason = None
+
+    def can_submit():
+        # 提前停止后不再提交，已提交的评估仍参与选择
+        remaining = monitor.remaining_evaluations()
+        return (reason is None and submitted < total and monitor.budget_reason() is None
+                and (remaining is None or len(pending) < remaining))
+
+    while pending or can_submit():
+        # 填满空闲槽位，目标个体轮流选取
+        while can_submit() and len(pending) < slots:
+            i = submitted % pop_size
+            trials, F, CR = generator.generate(pop, fitness, targets=[i])
+            pending[evaluator.submit(trials[0])] = (i, trials[0], F[0], CR[0])
+            submitted += 1
+
+        done, _ = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+        for future in done:
+            i, trial, F, CR = pending.pop(future)
             try:
-                with mp.Pool(processes=MAX_CPU) as pool:
-                    # 使用starmap传递参数
-                    args_list = [(objective_func, ind) for ind in trial_pop]
-                    trial_fitness = pool.starmap(evaluate_individual, args_list)
+                trial_fitness = future.result()
             except Exception as e:
-                print(f"⚠️ 并行评估出错: {str(e)}")
-                # 回退到串行评估
-                trial_fitness = [objective_func(ind) for ind in trial_pop]
-        else:
-            trial_fitness = [objective_func(ind) for ind in trial_pop]
+                print(f"⚠️ 评估出错: {str(e)}")
+                trial_fitness = float('inf')
+            completed += 1
+            monitor.add_evaluations(1)
 
-        # 选择操作
-        improved_count = 0
-        for i in range(pop_size):
-            if trial_fitness[i] < fitness[i]:
-                pop[i] = trial_pop[i]
-                fitness[i] = trial_fitness[i]
+            # 选择操作(与目标个体的当前值比较)
+            improvement = 0.0
+            if trial_fitness < fitness[i]:
+                improvement = fitness[i] - trial_fitness
+                pop[i] = trial
+                fitness[i] = trial_fitness
                 improved_count += 1
 
                 # 更新全局最优
-                if trial_fitness[i] < best_fitness:
-                    best_fitness = trial_fitness[i]
-                    best_individual = trial_pop[i].copy()
+                if trial_fitness < best_fitness:
+                    best_fitness = trial_fitness
+                    best_individual = trial.copy()
+            used_F.append(F)
+            used_CR.append(CR)
+            improvements.append(improvement)
 
-        # 输出当前代信息
-        print(f"🔄 改进个体: {improved_count}/{pop_size}")
-        print(f"🔥 当前最优值: {best_fitness:.6f}")
-        print(f"🧬 最优个体: {best_individual}")
+            # 每完成pop_size次评估输出一次进度(相当于一代)
+            if completed % pop_size == 0:
+                generator.update(used_F, used_CR, improvements)
+                used_F, used_CR, improvements = [], [], []
+
+                log(f"\n📘 Evaluations {completed}/{total}")
+                log(f"🔄 改进个体: {improved_count}/{pop_size}")
+                log(f"🔥 当前最优值: {best_fitness:.6f}")
+                log(f"🧬 最优个体: {best_individual}")
+                run_log.event("generation", gen=completed // pop_size, best=float(best_fitness),
+                              improved=improved_count, evaluations=pop_size,
+                              duration=time.time() - gen_start)
+                improved_count = 0
+                gen_start = time.time()
+                if reason is None:
+                    reason = monitor.update(pop, fitness, generator.bounds)
+
+                # 检查点只记录已完成的评估，进行中的试验向量恢复后重新生成
+                if checkpointer is not None:
+                    gen = completed // pop_size
+                    checkpointer.maybe_save(gen, _checkpoint_state(generator.bounds, pop, fitness, gen,
+                                                                   completed, generator, monitor=monitor))
 
-    return best_individual, best_fitness
+    # 评估次数预算用完时可能不在整代边界上
+    reason = reason or monitor.budget_reason()
+    return best_individual, best_fitness, reason
@@ -0,0 +1,217 @@
+import numpy as np
+
+# 变异策略及所需的随机个体数
+STRATEGIES = {
+    "rand/1": 3,
+    "best/1": 2,
+    "current-to-best/1": 2,
+    "rand/2": 5,
+}
+
+
+def make_rng(seed=None):
+    """创建随机数生成器(seed为None时使用系统熵)"""
+    return np.random.default_rng(seed)
+
+
+def distinct_indices(pop_size, targets, count, rng):
+    """
+    为每个目标个体选取count个互不相同且不等于自身的个体序号
+    :param targets: 目标个体序号数组 (n,)
+    :return: 序号数组 (n, count)
+    """
+    keys = rng.random((len(targets), pop_size))
+    keys[np.arange(len(targets)), targets] = np.inf
+    return np.argpartition(keys, count, axis=1)[:, :count]
+
+
+def reflect_bounds(x, lower, upper):
+    """反射边界处理: 越界部分按边界镜像折回(多次越界时反复折返)"""
+    width = upper - lower
+    safe = np.where(width > 0, width, 1.0)
+    y = np.mod(x - lower, 2 * safe)
+    y = np.where(y > safe, 2 * safe - y, y)
+    return np.where(width > 0, lower + y, lower)
+
+
+def mutate(pop, fitness, targets, F, strategy, rng):
+    """
+    按策略生成变异向量
+    :param targets: 目标个体序号数组 (n,)
+    :param F: 缩放因子，标量或 (n,) 数组
+    :return: 变异向量 (n, dim)
+    """
+    if strategy not in STRATEGIES:
+        raise ValueError(f"未知的变异策略: {strategy}")
+    r = distinct_indices(len(pop), targets, STRATEGIES[strategy], rng)
+    F = np.reshape(F, (-1, 1)) if np.ndim(F) else F
+
+    if strategy == "rand/1":
+        return pop[r[:, 0]] + F * (pop[r[:, 1]] - pop[r[:, 2]])
+    if strategy == "rand/2":
+        return pop[r[:, 0]] + F * (pop[r[:, 1]] - pop[r[:, 2]]) + F * (pop[r[:, 3]] - pop[r[:, 4]])
+
+    best = pop[np.argmin(fitness)]
+    if strategy == "best/1":
+        return best + F * (pop[r[:, 0]] - pop[r[:, 1]])
+    # current-to-best/1
+    current = pop[targets]
+    return current + F * (best - current) + F * (pop[r[:, 0]] - pop[r[:, 1]])
+
+
+def crossover(target, mutant, CR, rng):
+    """二项式交叉(每个试验向量至少有一维来自变异向量)"""
+    n, dim = target.shape
+    CR = np.reshape(CR, (-1, 1)) if np.ndim(CR) else CR
+    cross = rng.random((n, dim)) < CR
+    cross[np.arange(n), rng.integers(0, dim, n)] = True
+    return np.where(cross, mutant, target)
+
+
+def generate_trials(pop, fitness, bounds, F, CR, strategy="rand/1", rng=None, targets=None,
+                    bound_handling="reflect"):
+    """
+    整个种群一次生成试验向量(变异 + 边界处理 + 交叉)
+    :param fitness: 适应度(best类策略需要)，可为None
+    :param F: 缩放因子，标量或每个目标个体一个值
+    :param CR: 交叉概率，标量或每个目标个体一个值
+    :param targets: 目标个体序号，默认全部个体
+    :param bound_handling: 边界处理方式 reflect(反射)/clip(截断)
+    :return: 试验向量 (n, dim)
+    """
+    rng = rng if rng is not None else make_rng()
+    targets = np.arange(len(pop)) if targets is None else np.asarray(targets)
+    lower = np.array([b[0] for b in bounds], dtype=float)
+    upper = np.array([b[1] for b in bounds], dtype=float)
+
+    mutant = mutate(pop, fitness, targets, F, strategy, rng)
+    if bound_handling == "clip":
+        mutant = np.clip(mutant, lower, upper)
+    else:
+        mutant = reflect_bounds(mutant, lower, upper)
+    return crossover(pop[targets], mutant, CR, rng)
+
+
+class ParameterAdaptation:
+    """
+    F/CR自适应(JADE/SHADE)
+    每个试验向量采样自己的F和CR，成功改进的参数值用于更新分布中心
+    """
+
+    def __init__(self, method="shade", F=0.5, CR=0.9, memory_size=5, c=0.1):
+        """
+        :param method: jade(单一均值，学习率c) / shade(历史记忆，按改进量加权)
+        :param F: F均值初值
+        :param CR: CR均值初值
+        :param memory_size: SHADE历史记忆长度
+        :param c: JADE学习率
+        """
+        if method not in ("jade", "shade"):
+            raise ValueError(f"未知的自适应方法: {method}")
+        self.method = method
+        self.c = c
+        size = memory_size if method == "shade" else 1
+        self.memory_F = np.full(size, float(F))
+        self.memory_CR = np.full(size, float(CR))
+        self._next = 0
+
+    def sample(self, n, rng):
+        """为n个试验向量采样F(柯西分布)和CR(正态分布)"""
+        slot = rng.integers(0, len(self.memory_F), n)
+        CR = np.clip(rng.normal(self.memory_CR[slot], 0.1), 0.0, 1.0)
+
+        F = np.zeros(n)
+        pending = np.arange(n)
+        # F<=0 时重新采样，大于1时截断为1
+        while len(pending):
+            values = self.memory_F[slot[pending]] + 0.1 * rng.standard_cauchy(len(pending))
+            ok = values > 0
+            F[pending[ok]] = np.minimum(values[ok], 1.0)
+            pending = pending[~ok]
+        return F, CR
+
+    def update(self, F, CR, improvement):
+        """
+        用成功改进的试验向量参数更新分布中心
+        :param improvement: 各试验向量的适应度改进量(未改进为0)
+        """
+        success = np.asarray(improvement) > 0
+        if not success.any():
+            return
+        F, CR = np.asarray(F)[success], np.asarray(CR)[success]
+        if self.method == "jade":
+            weights = np.full(len(F), 1.0 / len(F))
+        else:
+            # 父代评估失败(inf)时改进量为inf，按有限改进量的最大值计权
+            delta = np.asarray(improvement, dtype=float)[success]
+            finite = np.isfinite(delta)
+            delta[~finite] = delta[finite].max() if finite.any() else 1.0
+            weights = delta / delta.sum()
+
+        # F使用加权Lehmer均值，CR使用加权算术均值
+        mean_F = np.sum(weights * F ** 2) / np.sum(weights * F)
+        mean_CR = np.sum(weights * CR)
+        if self.method == "jade":
+            self.memory_F[0] = (1 - self.c) * self.memory_F[0] + self.c * mean_F
+            self.memory_CR[0] = (1 - self.c) * self.memory_CR[0] + self.c * mean_CR
+        else:
+            self.memory_F[self._next] = mean_F
+            self.memory_CR[self._next] = mean_CR
+            self._next = (self._next + 1) % len(self.memory_F)
+
+    def describe(self):
+        return f"{self.method} (F≈{self.memory_F.mean():.2f}, CR≈{self.memory_CR.mean():.2f})"
+
+
+class TrialGenerator:
+    """试验向量生成器: 变异策略、边界处理、F/CR自适应及随机数生成器(随检查点一起保存)"""
+
+    def __init__(self, bounds, F=0.5, CR=0.9, strategy="rand/1", adaptation=None,
+                 bound_handling="reflect", seed=None, memory_size=5, c=0.1):
+        """
+        :param strategy: 变异策略 rand/1 / best/1 / current-to-best/1 / rand/2
+        :param adaptation: F/CR自适应方法 None/jade/shade
+        :param bound_handling: 边界处理方式 reflect/clip
+        :param seed: 随机数种子
+        """
+        if strategy not in STRATEGIES:
+            raise ValueError(f"未知的变异策略: {strategy}")
+        self.bounds = list(bounds)
+        self.F = F
+        self.CR = CR
+        self.strategy = strategy
+        self.bound_handling = bound_handling
+        self.adaptation = ParameterAdaptation(adaptation, F, CR, memory_size, c) if adaptation else None
+        self.rng = make_rng(seed)
+
+    def min_pop_size(self):
+        """当前策略所需的最小种群规模"""
+        return STRATEGIES[self.strategy] + 1
+
+    def sample_parameters(self, n):
+        """为n个试验向量取F和CR(未启用自适应时为固定值)"""
+        if self.adaptation is None:
+            return np.full(n, float(self.F)), np.full(n, float(self.CR))
+        return self.adaptation.sample(n, self.rng)
+
+    def generate(self, pop, fitness, targets=None, F=None, CR=None):
+        """
+        生成试验向量
+        :param F: 各试验向量的F，None时重新采样(CR同)
+        :return: (试验向量, F, CR)
+        """
+        targets = np.arange(len(pop)) if targets is None else np.asarray(targets)
+        if F is None or CR is None:
+            F, CR = self.sample_parameters(len(targets))
+        trials = generate_trials(pop, fitness, self.bounds, F, CR, self.strategy, self.rng,
+                                 targets, self.bound_handling)
+        return trials, F, CR
+
+    def update(self, F, CR, improvement):
+        """根据本代成功改进的试验向量更新F/CR分布"""
+        if self.adaptation is not None:
+            self.adaptation.update(F, CR, improvement)
+
+    def describe(self):
+        adaptation = self.adaptation.describe() if self.adaptation else f"F={self.F} CR={self.CR}"
+        return f"{self.strategy}/bin | {adaptation} | 边界: {self.bound_handling}"
@@ -0,0 +1,329 @@
+import os
+import sys
+import time
+import socket
+import argparse
+import itertools
+import threading
+import concurrent.futures
+from collections import deque
+from multiprocessing.connection import Connection, deliver_challenge, answer_challenge
+from multiprocessing import AuthenticationError
+from config import (
+    SOLVER_BACKEND,
+    NODE_LABEL,
+    ODB_STEP,
+    ODB_FRAME,
+    DEFAULT_PARAM_FORMAT,
+    DIST_ADDRESS,
+    DIST_AUTHKEY,
+    DIST_HANDSHAKE_TIMEOUT,
+    DIST_MIN_AGENTS,
+    HEARTBEAT_INTERVAL,
+    HEARTBEAT_TIMEOUT,
+    AGENT_RECONNECT
+)
+from evaluator import PoolEvaluator
+from template_parser import TemplateParser
+from abaqus_util import JobScheduler, evaluate_design, make_backend
+from run_log import run_log, log, debug
+
+# 消息格式(经认证的连接上传递的元组):
+#   工作节点 → 协调节点: ("hello", 节点信息) / ("result", 任务号, {指标: 数值}) / ("heartbeat",)
+#   协调节点 → 工作节点: ("setup", 模板、指标及结果设置) / ("task", 任务号, 参数向量) / ("stop",)
+#   参数写入格式和结果位置以协调节点为准，工作节点的config.py不同也不影响目标值
+# 连接上的消息会被反序列化，双方须先用共享密钥互相认证
+
+
+def _require_authkey(authkey):
+    """分布式模式必须设置认证密钥(不提供默认值)"""
+    if not authkey:
+        raise ValueError("未设置认证密钥: 请在协调节点和所有工作节点上设置环境变量 ABAQUS_OPT_AUTHKEY")
+    return authkey.encode() if isinstance(authkey, str) else authkey
+
+
+def _handshake(sock, authkey, server, timeout=DIST_HANDSHAKE_TIMEOUT):
+    """
+    在限定时间内完成双向认证，返回Connection
+    :param sock: 已连接的socket(认证后关闭，连接由返回的Connection持有)
+    :param server: 协调节点一侧先发起挑战
+    :param timeout: 超时后关闭socket，阻塞中的读取随之结束
+    """
+    conn = Connection(sock.dup().detach())
+    timer = threading.Timer(timeout, sock.shutdown, args=(socket.SHUT_RDWR,))
+    timer.start()
+    try:
+        if server:
+            deliver_challenge(conn, authkey)
+            answer_challenge(conn, authkey)
+        else:
+            answer_challenge(conn, authkey)
+            deliver_challenge(conn, authkey)
+    except BaseException:
+        conn.close()
+        raise
+    finally:
+        timer.cancel()
+        sock.close()
+    return conn
+
+
+class DistributedEvaluator:
+    """
+    协调节点评估器(接口与PoolEvaluator相同)
+    工作节点连接后领取参数向量，在本机生成INP、求解并提取指标后返回，
+    节点断开或心跳超时时其未完成的任务重新排队
+    目标函数需提供 template_parser、metrics 和 from_results(results)
+    """
+
+    def __init__(self, objective_func, address=DIST_ADDRESS, authkey=DIST_AUTHKEY,
+                 min_agents=DIST_MIN_AGENTS, heartbeat_timeout=HEARTBEAT_TIMEOUT):
+        """
+        :param address: 监听地址 (host, port)
+        :param authkey: 连接认证密钥(必须设置)
+        :param min_agents: 返回前至少等待连接的工作节点数
+        :param heartbeat_timeout: 心跳超时(秒)
+        """
+        self.objective_func = objective_func
+        self.heartbeat_timeout = heartbeat_timeout
+        self._authkey = _require_authkey(authkey)
+        template_parser = objective_func.template_parser
+        if not template_parser.template_hash:
+            template_parser.load_template()
+        self._setup = {
+            "template": template_parser.template_content,
+            "metrics": list(objective_func.metrics),
+            "backend": SOLVER_BACKEND,
+            "param_formats": {name: template_parser.format_specs.get(name, DEFAULT_PARAM_FORMAT)
+                              for name in template_parser.param_map},
+            "node": NODE_LABEL,
+            "step": ODB_STEP,
+            "frame": ODB_FRAME,
+        }
+
+        self._lock = threading.Lock()
+        self._tasks = deque()      # 待分发的任务号
+        self._futures = {}         # 任务号 -> (参数向量, Future)
+        self._agents = {}          # 节点名 -> 作业槽位数
+        self._ids = itertools.count()
+        self._closed = threading.Event()
+        self._threads = []
+
+        self._socket = socket.create_server(tuple(address))
+        threading.Thread(target=self._accept, daemon=True).start()
+        log(f"📡 协调节点监听 {address[0]}:{address[1]}，等待 {min_agents} 个工作节点连接...")
+        while len(self._agents) < min_agents:
+            time.sleep(0.2)
+
+    @property
+    def max_workers(self):
+        """当前已连接工作节点的作业槽位总数"""
+        with self._lock:
+            return max(1, sum(self._agents.values()))
+
+    def submit(self, x):
+        """提交单个个体，返回Future"""
+        future = concurrent.futures.Future()
+        with self._lock:
+            task_id = next(self._ids)
+            self._futures[task_id] = (x, future)
+            self._tasks.append(task_id)
+        return future
+
+    def map(self, xs):
+        """评估一组个体，结果顺序与输入一致"""
+        futures = [self.submit(x) for x in xs]
+        return [future.result() for future in futures]
+
+    def close(self):
+        """通知工作节点结束并停止监听"""
+        self._closed.set()
+        for thread in self._threads:
+            thread.join()
+        self._socket.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _accept(self):
+        # 认证在各连接自己的线程中进行，不响应的客户端不会阻塞其他节点连接
+        while not self._closed.is_set():
+            try:
+                sock, peer = self._socket.accept()
+            except OSError:
+                break
+            thread = threading.Thread(target=self._serve, args=(sock, peer), daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _complete(self, task_id, results):
+        with self._lock:
+            entry = self._futures.pop(task_id, None)
+        # 重新排队的任务可能被两个节点先后完成，只采用第一个结果
+        if entry is None:
+            return
+        future = entry[1]
+        try:
+            future.set_result(self.objective_func.from_results(results))
+        except Exception as e:
+            future.set_exception(e)
+
+    def _serve(self, sock, peer):
+        """与一个工作节点通信: 认证后分发任务、接收结果和心跳"""
+        try:
+            conn = _handshake(sock, self._authkey, server=True)
+        except (AuthenticationError, EOFError, OSError) as e:
+            print(f"⚠️ 拒绝未通过认证的连接 {peer[0]}:{peer[1]} ({str(e) or type(e).__name__})")
+            return
+
+        name = "?"
+        inflight = set()
+        try:
+            if not conn.poll(self.heartbeat_timeout):
+                raise TimeoutError("未收到节点信息")
+            _, hello = conn.recv()
+            name = f"{hello['host']}:{hello['pid']}"
+            slots = int(hello['slots'])
+            conn.send(("setup", self._setup))
+            with self._lock:
+                self._agents[name] = slots
+            log(f"🔗 工作节点已连接: {name} ({slots}个作业槽位)")
+            run_log.event("agent_join", agent=name, slots=slots)
+
+            last_seen = time.time()
+            while not self._closed.is_set():
+                # 填满该节点的空闲槽位
+                while len(inflight) < slots:
+                    with self._lock:
+                        task_id = self._tasks.popleft() if self._tasks else None
+                        entry = self._futures.get(task_id)
+                    if task_id is None:
+                        break
+                    if entry is None:
+                        continue
+                    conn.send(("task", task_id, [float(v) for v in entry[0]]))
+                    inflight.add(task_id)
+
+                if conn.poll(0.1):
+                    message = conn.recv()
+                    last_seen = time.time()
+                    if message[0] == "result":
+                        inflight.discard(message[1])
+                        self._complete(message[1], message[2])
+                elif time.time() - last_seen > self.heartbeat_timeout:
+                    raise TimeoutError(f"{self.heartbeat_timeout}秒未收到心跳")
+            conn.send(("stop",))
+
+        except (EOFError, OSError, TimeoutError) as e:
+            if not self._closed.is_set():
+                print(f"⚠️ 工作节点失联: {name} ({str(e) or type(e).__name__})")
+        finally:
+            with self._lock:
+                self._agents.pop(name, None)
+                # 未完成的任务放回队首，由其他节点优先处理
+                requeued = [task_id for task_id in sorted(inflight, reverse=True) if task_id in self._futures]
+                self._tasks.extendleft(requeued)
+            if requeued:
+                log(f"🔁 {len(requeued)} 个任务重新排队")
+            run_log.event("agent_leave", agent=name, requeued=len(requeued))
+            conn.close()
+
+
+class DesignEvaluation:
+    """工作节点上的设计评估: 生成INP、求解并提取指标，返回{指标: 数值}"""
+
+    def __init__(self, template_parser, metrics, scheduler, backend):
+        self.template_parser = template_parser
+        self.metrics = list(metrics)
+        self.scheduler = scheduler
+        self.backend = backend
+
+    def __call__(self, x):
+        return evaluate_design(x, self.template_parser, self.metrics, self.scheduler, self.backend)
+
+
+def run_agent(address, authkey=DIST_AUTHKEY, slots=None, heartbeat=HEARTBEAT_INTERVAL):
+    """
+    工作节点: 连接协调节点，在本机并行评估领取的参数向量直到协调节点结束
+    :param address: 协调节点地址 (host, port)
+    :param authkey: 连接认证密钥(必须设置，防止连接到伪造的协调节点)
+    :param slots: 并发作业数，None时由本机的作业调度器决定
+    :param heartbeat: 心跳间隔(秒)
+    """
+    authkey = _require_authkey(authkey)
+    scheduler = JobScheduler(max_jobs=slots) if slots else JobScheduler()
+    sock = socket.create_connection(tuple(address), timeout=DIST_HANDSHAKE_TIMEOUT)
+    sock.settimeout(None)
+    conn = _handshake(sock, authkey, server=False)
+    try:
+        conn.send(("hello", {"host": socket.gethostname(), "pid": os.getpid(), "slots": scheduler.max_jobs}))
+        _, setup = conn.recv()
+        template_parser = TemplateParser()
+        template_parser.format_specs = dict(setup["param_formats"])
+        template_parser.load_text(setup["template"])
+        metrics = setup["metrics"]
+        backend = make_backend(setup["backend"], node=setup["node"], step=setup["step"], frame=setup["frame"])
+        objective = DesignEvaluation(template_parser, metrics, scheduler, backend)
+        print(f"🔗 已连接协调节点 {address[0]}:{address[1]} | {scheduler.describe()} | 求解器: {setup['backend']}")
+
+        failed = {metric: float('inf') for metric in metrics}
+        completed = 0
+        with PoolEvaluator(objective, scheduler.max_jobs) as evaluator:
+            pending = {}  # Future -> 任务号
+            last_beat = time.time()
+            while True:
+                if conn.poll(0.1):
+                    message = conn.recv()
+                    if message[0] == "stop":
+                        break
+                    if message[0] == "task":
+                        debug(f"📥 任务 {message[1]}: {message[2]}")
+                        pending[evaluator.submit(message[2])] = message[1]
+
+                for future in [f for f in pending if f.done()]:
+                    task_id = pending.pop(future)
+                    try:
+                        results = future.result()
+                    except Exception as e:
+                        print(f"⚠️ 评估出错: {str(e)}")
+                        results = failed
+                    conn.send(("result", task_id, results))
+                    completed += 1
+
+                if time.time() - last_beat >= heartbeat:
+                    conn.send(("heartbeat",))
+                    last_beat = time.time()
+        print(f"✅ 协调节点已结束，本节点完成 {completed} 次评估")
+    finally:
+        conn.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="分布式评估工作节点")
+    parser.add_argument("--host", required=True, help="协调节点地址")
+    parser.add_argument("--port", type=int, default=DIST_ADDRESS[1], help="协调节点端口")
+    parser.add_argument("--slots", type=int, default=None, help="并发作业数(默认按本机CPU自动确定)")
+    parser.add_argument("--persist", action="store_true", help="连接失败或断开后持续重连")
+    args = parser.parse_args(argv)
+    if not DIST_AUTHKEY:
+        print("❌ 未设置认证密钥: 请设置环境变量 ABAQUS_OPT_AUTHKEY (与协调节点一致)")
+        sys.exit(1)
+
+    while True:
+        try:
+            run_agent((args.host, args.port), slots=args.slots)
+        except (ConnectionError, EOFError, OSError) as e:
+            print(f"⚠️ 与协调节点的连接中断: {str(e) or type(e).__name__}")
+        except AuthenticationError:
+            print("❌ 认证失败，请检查 DIST_AUTHKEY")
+            sys.exit(1)
+        if not args.persist:
+            break
+        time.sleep(AGENT_RECONNECT)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+from config import CACHE_PATH
+
+
+class EvaluationCache:
+    """基于SQLite的持久化评估缓存（可在多个进程间共享）"""
+
+    def __init__(self, path=CACHE_PATH):
+        self.path = path
+        self._conn = None
+        self._pid = None
+
+    def _connect(self):
+        """获取当前进程的数据库连接（SQLite连接不能跨进程复用）"""
+        if self._conn is None or self._pid != os.getpid():
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=60)
+            try:
+                # WAL模式允许多个进程同时读取，写入互不阻塞读取
+                conn.execute("PRAGMA journal_mode=WAL")
+            except sqlite3.DatabaseError:
+                pass
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS evaluations ("
+                "key TEXT PRIMARY KEY, template_hash TEXT, params TEXT, "
+                "target TEXT, value REAL, job_name TEXT, created REAL)"
+            )
+            conn.commit()
+            self._conn = conn
+            self._pid = os.getpid()
+        return self._conn
+
+    def make_key(self, template_hash, values, target):
+        """
+        由模板哈希、参数文本和优化目标生成缓存键
+        :param values: 写入INP的参数文本(TemplateParser.format_values)，相同的INP得到相同的键
+        """
+        payload = json.dumps([template_hash, list(values), target])
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        """查询缓存，未命中返回None"""
+        try:
+            row = self._connect().execute(
+                "SELECT value FROM evaluations WHERE key = ?", (key,)
+            ).fetchone()
+        except sqlite3.Error as e:
+            print(f"⚠️ 读取评估缓存失败: {str(e)}")
+            return None
+        return None if row is None else row[0]
+
+    def put(self, key, template_hash, values, target, value, job_name=None):
+        """写入一条评估结果"""
+        try:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO evaluations VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, template_hash, json.dumps(list(values)), target,
+                 float(value), job_name, time.time())
+            )
+            conn.commit()
+        except sqlite3.Error as e:
+            print(f"⚠️ 写入评估缓存失败: {str(e)}")
+
+    def __getstate__(self):
+        """用于序列化（数据库连接不可序列化）"""
+        state = self.__dict__.copy()
+        state['_conn'] = None
+        state['_pid'] = None
+        return state
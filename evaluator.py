@@ -0,0 +1,86 @@
+import concurrent.futures
+from config import MAX_CPU
+
+# 工作进程内的目标函数(由初始化函数设置，每个进程只反序列化一次)
+_worker_objective = None
+
+
+def _init_worker(objective_func):
+    """工作进程初始化：目标函数及模板只在进程启动时加载一次"""
+    global _worker_objective
+    _worker_objective = objective_func
+
+
+def _evaluate_in_worker(x):
+    """在工作进程中评估单个个体(每个任务只传递参数向量)"""
+    return _worker_objective(x)
+
+
+class SerialEvaluator:
+    """串行评估器"""
+
+    def __init__(self, objective_func):
+        self.objective_func = objective_func
+        self.max_workers = 1
+
+    def submit(self, x):
+        """立即评估并返回已完成的Future"""
+        future = concurrent.futures.Future()
+        try:
+            future.set_result(self.objective_func(x))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def map(self, xs):
+        """按顺序评估一组个体"""
+        return [self.objective_func(x) for x in xs]
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class PoolEvaluator(SerialEvaluator):
+    """常驻进程池评估器(整个优化过程只创建一次)"""
+
+    def __init__(self, objective_func, max_workers=MAX_CPU):
+        super().__init__(objective_func)
+        self.max_workers = max_workers
+        self._executor = concurrent.futures.ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=_init_worker,
+            initargs=(objective_func,)
+        )
+
+    def submit(self, x):
+        """异步提交单个个体"""
+        return self._executor.submit(_evaluate_in_worker, x)
+
+    def map(self, xs):
+        """并行评估一组个体，结果顺序与输入一致"""
+        try:
+            futures = [self.submit(x) for x in xs]
+            return [future.result() for future in futures]
+        except Exception as e:
+            print(f"⚠️ 并行评估出错: {str(e)}")
+            # 回退到串行评估
+            return super().map(xs)
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+
+def make_evaluator(objective_func, parallel=False, max_workers=MAX_CPU, distributed=False):
+    """根据配置创建评估器(distributed为True时由远程工作节点评估)"""
+    if distributed:
+        from distributed import DistributedEvaluator
+        return DistributedEvaluator(objective_func)
+    if parallel:
+        return PoolEvaluator(objective_func, max_workers=max_workers)
+    return SerialEvaluator(objective_func)
@@ -1,13 +1,17 @@
 import os
 import re
 import sys
+import json
+from inp_index import InpIndex
 
 
 class INPEditor:
     def __init__(self):
         self.param_pattern = r"\${(\w+)}"
         self.param_map = {}
-        self.lines = []
+        # 大文件不整体读入内存: 通过行索引按需读取，修改以补丁形式保存
+        self.index = None
+        self.patches = {}
         self.param_counter = 1
         self.original_path = os.path.join(os.getcwd(), "try.inp")
         self.template_path = os.path.join(os.getcwd(), "template.inp")
@@ -16,18 +20,33 @@ class INPEditor:
             raise FileNotFoundError(f"原始INP文件不存在: {self.original_path}")
 
     def load_file(self):
-        """加载原始INP文件"""
-        with open(self.original_path, 'r', encoding='utf-8') as f:
-            self.lines = f.readlines()
-        print(f"📄 已加载INP文件: {self.original_path} ({len(self.lines)}行)")
+        """加载原始INP文件(建立行索引和关键字块索引)"""
+        if self.index is not None:
+            self.index.close()
+        self.index = InpIndex(self.original_path)
+        self.patches = {}
+        print(f"📄 已加载INP文件: {self.original_path} "
+              f"({self.index.line_count}行, {len(self.index.blocks)}个关键字块)")
+
+    @property
+    def line_count(self):
+        return self.index.line_count
+
+    def get_line(self, line_idx):
+        """读取一行(优先返回已修改的内容)"""
+        if line_idx in self.patches:
+            return self.patches[line_idx]
+        return self.index.get_line(line_idx)
 
     def display_lines(self, start=0, end=20):
         """显示文件内容片段，并显示字段序号"""
+        end = min(end, self.line_count)
         print("\n" + "=" * 80)
-        print(f"INP文件内容 (行 {start + 1}-{min(end, len(self.lines))}):")
+        print(f"INP文件内容 (行 {start + 1}-{end}):")
         print("=" * 80)
-        for i, line in enumerate(self.lines[start:end], start=start):
-            # 显示行号和原始行内容
+        for i in range(start, end):
+            line = self.get_line(i)
+            # 显示行号和行内容
             line = line.rstrip()
             print(f"{i + 1:4d} | {line}")
 
@@ -59,11 +78,11 @@ class INPEditor:
             line_idx = int(line_num) - 1
             field_idx = int(field_num) - 1
 
-            if line_idx < 0 or line_idx >= len(self.lines):
+            if line_idx < 0 or line_idx >= self.line_count:
                 print(f"❌ 无效行号: {line_num}")
                 return False
 
-            line = self.lines[line_idx].rstrip()
+            line = self.get_line(line_idx).rstrip()
 
             # 解析数据行
             fields = self.parse_data_line(line)
@@ -97,7 +116,7 @@ class INPEditor:
 
             # 添加换行符
             new_line += '\n'
-            self.lines[line_idx] = new_line
+            self.patches[line_idx] = new_line
 
             self.param_map[param_name] = {
                 "line": line_idx + 1,
@@ -117,13 +136,17 @@ class INPEditor:
     def save_template(self):
         """保存模板文件"""
         try:
-            with open(self.template_path, 'w', encoding='utf-8') as f:
-                f.writelines(self.lines)
+            # 未修改的区域直接从原文件整段复制
+            self.index.write_patched(self.template_path, self.patches)
             print(f"💾 模板已保存: {self.template_path}")
 
             # 生成边界配置建议
             bounds = []
             for param, info in self.param_map.items():
+                # 参数说明文件中指定的边界优先
+                if info.get('bounds'):
+                    bounds.append(tuple(float(b) for b in info['bounds']))
+                    continue
                 try:
                     orig_val = float(info['original_value'])
                     low_bound = max(0.1 * orig_val, orig_val * 0.5)
@@ -139,6 +162,105 @@ class INPEditor:
             print(f"❌ 保存模板失败: {str(e)}")
             return []
 
+    def _data_lines(self, block):
+        """关键字块中的数据行序号(跳过注释和空行)"""
+        for line_idx in range(block.data_start, block.end):
+            line = self.get_line(line_idx).strip()
+            if line and not line.startswith('**'):
+                yield line_idx
+
+    @staticmethod
+    def _label_matches(field, label):
+        """比较数据行首字段与标签(数值按数值比较，其他忽略大小写)"""
+        try:
+            return float(field) == float(label)
+        except ValueError:
+            return field.upper() == str(label).upper()
+
+    def find_data_line(self, keyword, label=None, row=None, params=None, material=None,
+                       occurrence=None):
+        """
+        按关键字定位数据行
+        :param keyword: 关键字，如 *NODE / *ELASTIC / *CLOAD
+        :param label: 按数据行首字段匹配(节点号、单元号、节点集名等)
+        :param row: 块内第几个数据行(从1开始)，未指定label时默认为1
+        :param params: 关键字参数过滤，如 {"NAME": "STEEL"}
+        :param material: 限定在 *MATERIAL, NAME=<material> 之后的第一个匹配块
+        :param occurrence: 第几个匹配块(从0开始)，默认在所有匹配块中查找
+        :return: 行序号(从0开始)，未找到返回-1
+        """
+        blocks = self.index.find_blocks(keyword, **(params or {}))
+        if material is not None:
+            materials = self.index.find_blocks("*MATERIAL")
+            starts = [b.line for b in materials if b.params.get("NAME", "").upper() == material.upper()]
+            if not starts:
+                return -1
+            # 材料范围: 到下一个*MATERIAL为止
+            later = [b.line for b in materials if b.line > starts[0]]
+            stop = later[0] if later else self.line_count
+            blocks = [b for b in blocks if starts[0] < b.line < stop][:1]
+        if occurrence is not None:
+            blocks = blocks[occurrence:occurrence + 1]
+
+        for block in blocks:
+            for n, line_idx in enumerate(self._data_lines(block), start=1):
+                if label is not None:
+                    fields = self.parse_data_line(self.get_line(line_idx))
+                    if fields and self._label_matches(fields[0], label):
+                        return line_idx
+                elif n == (row or 1):
+                    return line_idx
+        return -1
+
+    def parameterize_keyword(self, keyword, field, label=None, row=None, params=None,
+                             material=None, occurrence=None, bounds=None):
+        """
+        按关键字定位并参数化字段(非交互式)
+        :param field: 字段序号(从1开始)
+        :param bounds: 参数边界 (min, max)，未指定时按原始值自动建议
+        :return: 参数名，失败返回None
+        """
+        line_idx = self.find_data_line(keyword, label, row, params, material, occurrence)
+        if line_idx < 0:
+            print(f"❌ 未找到数据行: {keyword} label={label} row={row}")
+            return None
+
+        param_name = f"x{self.param_counter}"
+        if not self.parameterize(line_idx + 1, field):
+            return None
+        if bounds is not None:
+            self.param_map[param_name]["bounds"] = list(bounds)
+        return param_name
+
+    def apply_spec(self, spec):
+        """
+        按参数说明批量参数化并保存模板
+        :param spec: {"parameters": [{"keyword": "*NODE", "label": 1, "field": 2, "bounds": [0.5, 2.0]}, ...]}
+        :return: 边界列表，失败返回[]
+        """
+        self.load_file()
+        for entry in spec.get("parameters", []):
+            entry = dict(entry)
+            keyword = entry.pop("keyword")
+            field = entry.pop("field")
+            if self.parameterize_keyword(keyword, field, **entry) is None:
+                print(f"❌ 参数说明应用失败: {keyword} {entry}")
+                return []
+        return self.save_template()
+
+    def display_keyword_blocks(self, keyword):
+        """按关键字列出关键字块位置"""
+        blocks = self.index.find_blocks(keyword)
+        if not blocks:
+            print(f"⚠️ 未找到关键字: {keyword}")
+            return
+        for block in blocks[:50]:
+            params = ", ".join(f"{k}={v}" if v else k for k, v in block.params.items())
+            header = f"{block.keyword}, {params}" if params else block.keyword
+            print(f"{block.line + 1:6d} | {header} ({block.end - block.line - 1}行数据)")
+        if len(blocks) > 50:
+            print(f"... 共 {len(blocks)} 个")
+
     def interactive_edit(self):
         """交互式编辑流程"""
         print("\n" + "=" * 80)
@@ -156,6 +278,8 @@ class INPEditor:
             print("2. 参数化字段")
             print("3. 完成并保存模板")
             print("4. 退出")
+            print("5. 按关键字查找 (如 *NODE, *ELASTIC)")
+            print("6. 查找文本")
 
             choice = input("请选择操作: ").strip()
 
@@ -187,5 +311,29 @@ class INPEditor:
                     print("退出编辑")
                     return []
 
+            elif choice == '5':
+                keyword = input("输入关键字: ").strip()
+                if keyword:
+                    self.display_keyword_blocks(keyword)
+
+            elif choice == '6':
+                text = input("输入要查找的文本: ").strip()
+                start_line = input("输入起始行号 (默认为1): ").strip() or "1"
+                try:
+                    line_idx = self.index.find(text, max(0, int(start_line) - 1))
+                except ValueError:
+                    print("❌ 请输入有效数字")
+                    continue
+                if line_idx < 0:
+                    print(f"⚠️ 未找到: {text}")
+                else:
+                    self.display_lines(max(0, line_idx - 2), line_idx + 8)
+
             else:
-                print("❌ 无效选择")
\ No newline at end of file
+                print("❌ 无效选择")
+
+
+def load_spec(path):
+    """读取参数说明文件(JSON)"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
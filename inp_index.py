@@ -0,0 +1,146 @@
+import os
+import mmap
+import numpy as np
+
+# 建立行索引时每次扫描的字节数
+SCAN_CHUNK_BYTES = 16 * 1024 * 1024
+
+
+class KeywordBlock:
+    """关键字块: 关键字行及其后的数据行"""
+
+    def __init__(self, keyword, params, line, end):
+        self.keyword = keyword    # 关键字名称(大写)，如 *NODE
+        self.params = params      # 关键字参数，如 {"NAME": "STEEL"}
+        self.line = line          # 关键字行的行序号(从0开始)
+        self.end = end            # 块结束行序号(不含)
+
+    @property
+    def data_start(self):
+        return self.line + 1
+
+    def __repr__(self):
+        return f"KeywordBlock({self.keyword}, {self.params}, lines {self.line + 1}-{self.end})"
+
+
+def parse_keyword_line(line):
+    """解析关键字行，返回 (关键字, 参数字典)"""
+    parts = [p.strip() for p in line.strip().rstrip(',').split(',')]
+    keyword = parts[0].upper()
+    params = {}
+    for part in parts[1:]:
+        if not part:
+            continue
+        key, _, value = part.partition('=')
+        params[key.strip().upper()] = value.strip()
+    return keyword, params
+
+
+class InpIndex:
+    """
+    INP文件的内存映射索引
+    只保存行偏移量和关键字块位置，按需读取所需行，适用于GB级大文件
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        size = os.path.getsize(path)
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b''
+        self.size = size
+        self.offsets = self._build_line_offsets()
+        self.blocks = self._build_keyword_blocks()
+
+    def _build_line_offsets(self):
+        """扫描换行符，得到每行的起始偏移量(最后一项为文件长度)"""
+        starts = [np.zeros(1, dtype=np.int64)]
+        for pos in range(0, self.size, SCAN_CHUNK_BYTES):
+            chunk = np.frombuffer(self._mm, dtype=np.uint8, count=min(SCAN_CHUNK_BYTES, self.size - pos),
+                                  offset=pos)
+            starts.append(np.flatnonzero(chunk == ord('\n')).astype(np.int64) + pos + 1)
+        offsets = np.concatenate(starts)
+        if offsets[-1] != self.size:
+            offsets = np.append(offsets, self.size)
+        return offsets
+
+    def _build_keyword_blocks(self):
+        """查找以*开头(非**注释)的关键字行，建立关键字块索引"""
+        if self.size == 0:
+            return []
+        data = np.frombuffer(self._mm, dtype=np.uint8)
+        line_starts = self.offsets[:-1]
+        first = data[line_starts]
+        second_pos = np.minimum(line_starts + 1, self.size - 1)
+        second = np.where(line_starts + 1 < self.offsets[1:], data[second_pos], 0)
+        keyword_lines = np.flatnonzero((first == ord('*')) & (second != ord('*')))
+
+        blocks = []
+        for n, line in enumerate(keyword_lines):
+            end = keyword_lines[n + 1] if n + 1 < len(keyword_lines) else self.line_count
+            keyword, params = parse_keyword_line(self.get_line(int(line)))
+            blocks.append(KeywordBlock(keyword, params, int(line), int(end)))
+        return blocks
+
+    @property
+    def line_count(self):
+        return len(self.offsets) - 1
+
+    def get_line(self, line_idx):
+        """读取单行(保留行尾换行符)"""
+        start, end = self.offsets[line_idx], self.offsets[line_idx + 1]
+        return self._mm[start:end].decode('utf-8', errors='replace')
+
+    def get_lines(self, start, end):
+        """读取[start, end)范围的行"""
+        end = min(end, self.line_count)
+        return [self.get_line(i) for i in range(max(0, start), end)]
+
+    def line_of_offset(self, offset):
+        """字节偏移量所在的行序号"""
+        return int(np.searchsorted(self.offsets, offset, side='right')) - 1
+
+    def find(self, text, start_line=0):
+        """从指定行开始查找文本，返回所在行序号，未找到返回-1"""
+        if start_line >= self.line_count:
+            return -1
+        pos = self._mm.find(text.encode('utf-8'), int(self.offsets[start_line]))
+        return -1 if pos < 0 else self.line_of_offset(pos)
+
+    def find_blocks(self, keyword=None, **params):
+        """按关键字名称和参数查找关键字块"""
+        keyword = keyword.upper() if keyword else None
+        if keyword and not keyword.startswith('*'):
+            keyword = '*' + keyword
+        result = []
+        for block in self.blocks:
+            if keyword and block.keyword != keyword:
+                continue
+            if any(block.params.get(k.upper(), '').upper() != str(v).upper() for k, v in params.items()):
+                continue
+            result.append(block)
+        return result
+
+    def block_of_line(self, line_idx):
+        """返回包含指定行的关键字块，不在任何块内返回None"""
+        starts = [block.line for block in self.blocks]
+        n = int(np.searchsorted(starts, line_idx, side='right')) - 1
+        return self.blocks[n] if n >= 0 else None
+
+    def write_patched(self, dest_path, patches):
+        """
+        按补丁写出新文件: 未修改的区域直接从原文件整段复制
+        :param patches: {行序号: 新行内容}
+        """
+        with open(dest_path, 'wb') as out:
+            pos = 0
+            for line_idx in sorted(patches):
+                start, end = self.offsets[line_idx], self.offsets[line_idx + 1]
+                out.write(self._mm[pos:start])
+                out.write(patches[line_idx].encode('utf-8'))
+                pos = end
+            out.write(self._mm[pos:self.size])
+
+    def close(self):
+        if self.size:
+            self._mm.close()
+        self._file.close()
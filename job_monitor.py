@@ -0,0 +1,190 @@
+import io
+import os
+import re
+from collections import deque
+from config import (
+    MAX_CUTBACKS,
+    CUTBACK_WINDOW,
+    MAX_ATTEMPTS,
+    MIN_TIME_INCREMENT,
+    PROJECTION_MARGIN,
+    MONITOR_GRACE,
+    STATIC_DIR_NAME
+)
+
+# 分析步关键字(数据行第二个值为分析步时间)
+_STEP_PROCEDURES = ("*STATIC", "*DYNAMIC", "*VISCO", "*HEAT TRANSFER", "*COUPLED TEMPERATURE-DISPLACEMENT",
+                    "*SOILS", "*MASS DIFFUSION")
+_INCLUDE_RE = re.compile(r"input\s*=\s*\"?([^\",]+)\"?", re.IGNORECASE)
+
+
+def analysis_time(inp_path=None, text=None):
+    """
+    逐行流式统计INP中各分析步的总时间(展开*INCLUDE，跳过共享的静态INCLUDE文件)
+    :param inp_path: INP文件路径；给出text时仅用于解析相对的INCLUDE路径
+    :param text: 直接统计的INP文本(如模板内容)
+    :return: 总时间，没有找到带时间的分析步或分析步时间含参数占位符时返回None
+    """
+    periods = []
+    state = {"pending": False, "unknown": False}  # pending: 上一行是分析步关键字，当前行为其数据行
+
+    def scan(lines, directory):
+        for line in lines:
+            stripped = line.strip()
+            if not stripped or stripped.startswith("**"):
+                continue
+            if stripped.startswith("*"):
+                upper = stripped.upper()
+                if upper.startswith("*INCLUDE"):
+                    match = _INCLUDE_RE.search(stripped)
+                    if match:
+                        read(os.path.join(directory, match.group(1).strip()))
+                    continue
+                state["pending"] = upper.startswith(_STEP_PROCEDURES)
+                if state["pending"]:
+                    # 未给出时间时Abaqus默认分析步时间为1.0
+                    periods.append(1.0)
+                continue
+            if state["pending"]:
+                fields = [v.strip() for v in stripped.split(",")]
+                try:
+                    periods[-1] = float(fields[1])
+                except (IndexError, ValueError):
+                    if len(fields) > 1 and "${" in fields[1]:
+                        state["unknown"] = True
+                state["pending"] = False
+
+    def read(path):
+        # 共享的静态INCLUDE文件只含模型数据，不含分析步定义
+        if STATIC_DIR_NAME in os.path.normpath(path).split(os.sep):
+            return
+        try:
+            with open(path, 'r', errors='ignore') as f:
+                scan(f, os.path.dirname(path))
+        except OSError:
+            pass
+
+    if text is not None:
+        scan(io.StringIO(text), os.path.dirname(inp_path) if inp_path else os.getcwd())
+    else:
+        read(inp_path)
+    if state["unknown"] or not periods:
+        return None
+    return sum(periods)
+
+
+class JobMonitor:
+    """
+    运行中作业的状态监视: 增量读取.sta/.msg文件，出现不收敛迹象时给出终止原因
+    (反复削减增量步、增量步过小、单个增量步尝试次数过多、预计完成时间超出预算、.msg中出现错误)
+    .sta按Abaqus/Standard格式解析
+    """
+
+    def __init__(self, run_dir, job_name, timeout, max_cutbacks=MAX_CUTBACKS, cutback_window=CUTBACK_WINDOW,
+                 max_attempts=MAX_ATTEMPTS, min_increment=MIN_TIME_INCREMENT,
+                 projection_margin=PROJECTION_MARGIN, grace=MONITOR_GRACE, total_time=None):
+        """
+        :param timeout: 作业运行时间预算(秒)
+        :param max_cutbacks: 最近cutback_window次尝试中允许的削减次数，超过时终止
+        :param cutback_window: 统计削减次数的尝试窗口
+        :param max_attempts: 单个增量步允许的不收敛尝试次数，超过时终止
+        :param min_increment: 增量步时间下限
+        :param projection_margin: 预计总耗时超过 timeout*projection_margin 时终止
+        :param grace: 启动后多少秒内不做耗时预测(前处理阶段没有进度)
+        :param total_time: 分析步总时间(通常由TemplateParser按模板计算一次)，None时扫描作业的INP
+        参数为None时不检查对应条件
+        """
+        self.sta_path = os.path.join(run_dir, f"{job_name}.sta")
+        self.msg_path = os.path.join(run_dir, f"{job_name}.msg")
+        self.timeout = timeout
+        self.max_cutbacks = max_cutbacks
+        self.max_attempts = max_attempts
+        self.min_increment = min_increment
+        self.projection_margin = projection_margin
+        self.grace = grace
+        if total_time is None and projection_margin:
+            total_time = analysis_time(os.path.join(run_dir, f"{job_name}.inp"))
+        self.total_time = total_time if projection_margin else None
+
+        self.cutbacks = 0              # 累计削减次数(仅用于输出)
+        self.failed_attempts = 0       # 当前增量步的不收敛尝试次数
+        self._current = None           # 当前增量步 (分析步, 增量步)
+        self._recent = deque(maxlen=cutback_window)   # 最近各次尝试是否削减
+        self.increment = None
+        self.progress = 0.0      # 已完成的分析步总时间
+        self.error = None
+        self._offsets = {}
+        self._partial = {}
+
+    def _new_lines(self, path):
+        """读取文件自上次以来新增的完整行"""
+        try:
+            with open(path, 'r', errors='ignore') as f:
+                f.seek(self._offsets.get(path, 0))
+                data = f.read()
+                self._offsets[path] = f.tell()
+        except OSError:
+            return []
+        data = self._partial.pop(path, "") + data
+        lines = data.split("\n")
+        if lines[-1]:
+            self._partial[path] = lines[-1]
+        return lines[:-1]
+
+    def _parse_sta(self, line):
+        # STEP INC ATT SEVERE EQUIL TOTAL TOTAL-TIME STEP-TIME INC-OF-TIME ...
+        fields = line.split()
+        if len(fields) < 9 or not (fields[0].isdigit() and fields[1].isdigit()):
+            return
+        try:
+            total_time, increment = float(fields[6]), float(fields[8])
+        except ValueError:
+            return
+        self.increment = increment
+        # 尝试次数带U后缀表示该次尝试不收敛、增量步被削减
+        cutback = fields[2].endswith("U")
+        self._recent.append(cutback)
+        if cutback:
+            key = (fields[0], fields[1])
+            self.failed_attempts = self.failed_attempts + 1 if key == self._current else 1
+            self._current = key
+            self.cutbacks += 1
+        else:
+            self.failed_attempts = 0
+            self._current = None
+            self.progress = total_time
+
+    def update(self):
+        """读取.sta/.msg的新增内容"""
+        for line in self._new_lines(self.sta_path):
+            self._parse_sta(line)
+        for line in self._new_lines(self.msg_path):
+            if self.error is None and "***ERROR" in line:
+                self.error = line.strip()
+
+    def check(self, elapsed):
+        """
+        检查作业是否应提前终止
+        :param elapsed: 作业已运行时间(秒)
+        :return: 终止原因，继续运行时返回None
+        """
+        self.update()
+        if self.error is not None:
+            return f".msg报错: {self.error[:200]}"
+        recent = sum(self._recent)
+        if self.max_cutbacks is not None and recent > self.max_cutbacks:
+            return f"最近 {len(self._recent)} 次尝试中削减增量步 {recent} 次"
+        if self.max_attempts is not None and self.failed_attempts > self.max_attempts:
+            return f"单个增量步连续 {self.failed_attempts} 次不收敛"
+        if self.min_increment is not None and self.increment is not None and self.increment < self.min_increment:
+            return f"增量步过小 ({self.increment:.3e})"
+        if (self.total_time and self.progress > 0 and self.timeout
+                and (self.grace is None or elapsed >= self.grace)):
+            projected = elapsed * self.total_time / self.progress
+            if projected > self.timeout * self.projection_margin:
+                return f"预计总耗时 {projected:.0f} 秒，超出预算 {self.timeout} 秒"
+        return None
+
+    def describe(self):
+        return (f"进度 {self.progress:g}/{self.total_time or '?'}, 削减 {self.cutbacks} 次, "
+                f"增量步 {self.increment if self.increment is not None else '-'}")
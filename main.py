@@ -2,24 +2,83 @@ import os
 import time
 import shutil
 import sys
+import numpy as np
 from de_algorithm import de
+from mo_de_algorithm import mo_de
 from config import (
     ORIGINAL_INP,
     TEMPLATE_FILE,
+    PARAM_SPEC_FILE,
     POP_SIZE,
     GENERATIONS,
     F,
     CR,
     PARALLEL,
+    INIT_METHOD,
+    ASYNC_DE,
+    DE_STRATEGY,
+    ADAPTATION,
+    BOUND_HANDLING,
+    DE_SEED,
+    DIVERSITY_TOL,
+    SPREAD_TOL,
+    STAGNATION_GENS,
+    STAGNATION_TOL,
+    MAX_EVALUATIONS,
+    MAX_WALL_TIME,
+    MAX_COARSE_EVALUATIONS,
+    RESTARTS,
+    RESTART_POP_FACTOR,
+    DISTRIBUTED,
+    DIST_ADDRESS,
+    DIST_AUTHKEY,
+    COARSE_TEMPLATE_FILE,
+    PROMOTE_FRACTION,
+    FIDELITY_TRUST,
+    FIDELITY_CONTROL,
+    FIDELITY_WINDOW,
+    SURROGATE,
+    SURROGATE_CANDIDATES,
+    SURROGATE_EVAL_FRACTION,
+    SURROGATE_REFIT_EVERY,
+    SURROGATE_TRUST,
+    SURROGATE_MAX_SAMPLES,
     RESULT_DIR,
+    SCRATCH_DIR,
     OPTIMIZATION_TARGET,
     OPTIMIZATION_DIRECTION,
+    MULTI_OBJECTIVE,
+    OBJECTIVES,
+    OBJECTIVE_DIRECTIONS,
     PROJECT_ROOT,
+    CACHE_ENABLED,
+    CACHE_FILE,
+    STATIC_DIR_NAME,
+    CHECKPOINT_PATH,
+    CHECKPOINT_EVERY,
+    SOLVER_BACKEND,
+    RUN_LOG_ENABLED,
+    RUN_LOG_PATH,
+    RETENTION_ENABLED,
+    KEEP_TOP_K,
+    RETENTION_ACTION,
     update_bounds
 )
 from template_parser import TemplateParser
-from inp_editor import INPEditor
-from abaqus_util import abaqus_objective
+from inp_editor import INPEditor, load_spec
+from surrogate import SurrogateScreen
+from multi_fidelity import MultiFidelityScreen
+from stopping import ConvergenceMonitor
+from abaqus_util import (
+    abaqus_objective,
+    abaqus_multi_objective,
+    objective_metrics,
+    recover_finished_jobs,
+    JobScheduler
+)
+from checkpoint import Checkpointer, load_checkpoint
+from run_log import run_log
+from retention import ResultRetention
 import multiprocessing as mp
 
 
@@ -32,6 +91,9 @@ def clean_result_folder():
     if os.path.exists(RESULT_DIR):
         print(f"🧹 清理结果目录: {RESULT_DIR}")
         for item in os.listdir(RESULT_DIR):
+            # 保留评估缓存(含SQLite的-wal/-shm文件)，供后续运行复用
+            if CACHE_ENABLED and item.startswith(CACHE_FILE):
+                continue
             item_path = os.path.join(RESULT_DIR, item)
             try:
                 if os.path.isfile(item_path):
@@ -44,9 +106,18 @@ def clean_result_folder():
         os.makedirs(RESULT_DIR, exist_ok=True)
         print(f"📁 创建结果目录: {RESULT_DIR}")
 
+    # 清理临时目录中上次运行残留的作业目录和静态文件
+    if SCRATCH_DIR and os.path.isdir(SCRATCH_DIR):
+        for item in os.listdir(SCRATCH_DIR):
+            if item.startswith("job_") or item == STATIC_DIR_NAME:
+                shutil.rmtree(os.path.join(SCRATCH_DIR, item), ignore_errors=True)
+
 
-def create_template():
-    """创建模板文件"""
+def create_template(spec_path=None):
+    """
+    创建模板文件
+    :param spec_path: 参数说明文件(JSON)，指定时不进入交互式编辑
+    """
     original_path = os.path.join(PROJECT_ROOT, ORIGINAL_INP)
     template_path = os.path.join(PROJECT_ROOT, TEMPLATE_FILE)
 
@@ -55,9 +126,18 @@ def create_template():
         print("请将Abaqus生成的INP文件保存为 'demo.inp'")
         return None, []
 
-    print("🛠️ 启动交互式模板编辑器...")
     editor = INPEditor()
-    suggested_bounds = editor.interactive_edit()
+    if spec_path:
+        print(f"🛠️ 按参数说明文件创建模板: {spec_path}")
+        try:
+            suggested_bounds = editor.apply_spec(load_spec(spec_path))
+        except (OSError, ValueError, TypeError, KeyError, AttributeError) as e:
+            # 文件不存在、JSON格式错误或条目含未知/缺少的字段
+            print(f"❌ 参数说明文件无效: {spec_path} ({type(e).__name__}: {str(e)})")
+            return None, []
+    else:
+        print("🛠️ 启动交互式模板编辑器...")
+        suggested_bounds = editor.interactive_edit()
     if not suggested_bounds:
         print("❌ 模板创建取消")
         return None, []
@@ -83,25 +163,96 @@ def apply_optimization_direction(value):
 class ObjectiveFunction:
     """可序列化的目标函数类"""
 
-    def __init__(self, template_parser):
+    def __init__(self, template_parser, scheduler=None):
         self.template_parser = template_parser
+        self.scheduler = scheduler
+        # 分布式评估时工作节点提取这些指标，由from_results换算为目标值
+        self.metrics = objective_metrics()
 
     def __call__(self, x):
         return apply_optimization_direction(
-            abaqus_objective(x, self.template_parser)
+            abaqus_objective(x, self.template_parser, self.scheduler)
         )
 
+    def from_results(self, results):
+        return apply_optimization_direction(results[OPTIMIZATION_TARGET])
 
-def main():
-    """主优化流程"""
-    # 初始化环境
-    clean_result_folder()
 
-    # 创建模板并获取边界建议
-    template_path, suggested_bounds = create_template()
-    if not template_path or not suggested_bounds:
-        print("❌ 优化准备失败")
-        return
+class MultiObjectiveFunction:
+    """可序列化的多目标函数类(各目标统一转换为最小化)"""
+
+    def __init__(self, template_parser, targets=OBJECTIVES, directions=OBJECTIVE_DIRECTIONS,
+                 scheduler=None):
+        self.template_parser = template_parser
+        self.targets = list(targets)
+        self.signs = [-1.0 if d == "max" else 1.0 for d in directions]
+        self.scheduler = scheduler
+        self.metrics = objective_metrics(self.targets)
+
+    def __call__(self, x):
+        values = abaqus_multi_objective(x, self.template_parser, self.targets, self.scheduler)
+        return [sign * value for sign, value in zip(self.signs, values)]
+
+    def from_results(self, results):
+        return [sign * results[target] for sign, target in zip(self.signs, self.targets)]
+
+
+def run_multi_objective(template_parser, bounds, start_time, scheduler):
+    """多目标优化流程，输出Pareto前沿"""
+    objective_func = MultiObjectiveFunction(template_parser, scheduler=scheduler)
+    pareto_x, pareto_f = mo_de(
+        objective_func=objective_func,
+        bounds=bounds,
+        pop_size=POP_SIZE,
+        gens=GENERATIONS,
+        F=F,
+        CR=CR,
+        parallel=PARALLEL,
+        init_method=INIT_METHOD,
+        max_workers=scheduler.max_jobs,
+        bound_handling=BOUND_HANDLING,
+        seed=DE_SEED,
+        distributed=DISTRIBUTED
+    )
+
+    # 还原目标值方向
+    pareto_f = pareto_f * objective_func.signs
+    order = np.argsort(pareto_f[:, 0])
+
+    print("\n" + "=" * 60)
+    print(f"✅ 优化完成! 耗时: {time.time() - start_time:.2f}秒")
+    print(f"🏆 Pareto前沿 ({len(order)}个解):")
+    for i in order:
+        values = ", ".join(f"{t}={v:.6f}" for t, v in zip(objective_func.targets, pareto_f[i]))
+        print(f"   {pareto_x[i]} -> {values}")
+    print("=" * 60)
+
+
+def main(resume=False, spec_path=PARAM_SPEC_FILE):
+    """
+    主优化流程
+    :param resume: 从检查点恢复(保留结果目录，跳过模板编辑)
+    :param spec_path: 参数说明文件，指定时以非交互方式创建模板
+    """
+    resume_state = None
+    if resume:
+        resume_state = load_checkpoint(CHECKPOINT_PATH)
+        if resume_state is None:
+            print(f"❌ 未找到检查点文件: {CHECKPOINT_PATH}")
+            return
+        if MULTI_OBJECTIVE:
+            print("❌ 多目标优化暂不支持从检查点恢复")
+            return
+        suggested_bounds = resume_state["bounds"]
+    else:
+        # 初始化环境
+        clean_result_folder()
+
+        # 创建模板并获取边界建议
+        template_path, suggested_bounds = create_template(spec_path)
+        if not template_path or not suggested_bounds:
+            print("❌ 优化准备失败")
+            return
 
     # 更新边界配置
     update_bounds(suggested_bounds)
@@ -116,18 +267,106 @@ def main():
         print(f"❌ 模板加载失败: {str(e)}")
         return
 
+    # 多保真度: 粗网格模板的参数须与模板一致
+    coarse_parser = None
+    if COARSE_TEMPLATE_FILE:
+        coarse_parser = TemplateParser(COARSE_TEMPLATE_FILE)
+        try:
+            coarse_parser.load_template()
+        except Exception as e:
+            print(f"❌ 粗网格模板加载失败: {str(e)}")
+            return
+        if coarse_parser.get_parameters() != template_parser.get_parameters():
+            print(f"❌ 粗网格模板参数 {coarse_parser.get_parameters()} 与模板参数 "
+                  f"{template_parser.get_parameters()} 不一致")
+            return
+
+    if resume_state is not None:
+        if resume_state.get("template_hash") != template_parser.template_hash:
+            print("❌ 模板文件已变化，无法从检查点恢复")
+            return
+        recover_finished_jobs(template_parser, objective_metrics())
+    checkpointer = Checkpointer(CHECKPOINT_PATH, CHECKPOINT_EVERY,
+                                meta={"template_hash": template_parser.template_hash})
+
+    # 作业调度器决定并发作业数和每个作业的CPU数
+    if DISTRIBUTED and not DIST_AUTHKEY:
+        print("❌ 分布式模式需要认证密钥: 请设置环境变量 ABAQUS_OPT_AUTHKEY")
+        return
+
+    try:
+        scheduler = JobScheduler()
+    except ValueError as e:
+        print(f"❌ 作业调度配置错误: {str(e)}")
+        return
     start_time = time.time()
 
     print("\n" + "=" * 60)
-    print(f"🚀 启动参数优化 | 目标: {OPTIMIZATION_DIRECTION} {OPTIMIZATION_TARGET}")
+    if MULTI_OBJECTIVE:
+        targets = ", ".join(f"{d} {t}" for d, t in zip(OBJECTIVE_DIRECTIONS, OBJECTIVES))
+        print(f"🚀 启动多目标参数优化 | 目标: {targets}")
+    else:
+        print(f"🚀 启动参数优化 | 目标: {OPTIMIZATION_DIRECTION} {OPTIMIZATION_TARGET}")
     print(f"🔢 参数空间: {suggested_bounds}")
     print(f"🧬 DE算法: {POP_SIZE}种群/{GENERATIONS}代 | F={F} CR={CR}")
+    print(f"🖥️ 作业调度: {scheduler.describe()} | 求解器: {SOLVER_BACKEND}")
+    if coarse_parser is not None:
+        print(f"🪜 多保真度: 粗网格模板 {COARSE_TEMPLATE_FILE}，每代 {PROMOTE_FRACTION:.0%} 及 {FIDELITY_CONTROL} 个对照样本提升到细网格")
+    if DISTRIBUTED:
+        print(f"📡 分布式评估: 工作节点连接 {DIST_ADDRESS[0]}:{DIST_ADDRESS[1]} (python distributed.py --host <本机地址>)")
+    if RUN_LOG_ENABLED:
+        print(f"📝 运行日志: {RUN_LOG_PATH}")
+    if RETENTION_ENABLED:
+        print(f"🗂️ 结果保留: 最优{KEEP_TOP_K}个作业保留全部文件, 其余{RETENTION_ACTION}")
     print("=" * 60 + "\n")
+    run_log.event("run_start", bounds=suggested_bounds, pop_size=POP_SIZE, gens=GENERATIONS,
+                  max_jobs=scheduler.max_jobs, cpus_per_job=scheduler.planned_cpus,
+                  backend=SOLVER_BACKEND, resume=resume_state is not None)
+
+    # 后台清理非最优作业的结果文件
+    retention = None
+    if RETENTION_ENABLED:
+        if MULTI_OBJECTIVE:
+            retention = ResultRetention(OBJECTIVES, OBJECTIVE_DIRECTIONS,
+                                        template_hash=template_parser.template_hash)
+        else:
+            retention = ResultRetention([OPTIMIZATION_TARGET], [OPTIMIZATION_DIRECTION],
+                                        template_hash=template_parser.template_hash)
+        retention.start()
 
     try:
+        if MULTI_OBJECTIVE:
+            if coarse_parser is not None:
+                print("⚠️ 多目标优化暂不支持多保真度筛选，已忽略")
+            run_multi_objective(template_parser, suggested_bounds, start_time, scheduler)
+            return
+
         # 创建可序列化的目标函数
         # objective_func = create_objective_function(template_parser)
-        objective_func = ObjectiveFunction(template_parser)
+        objective_func = ObjectiveFunction(template_parser, scheduler)
+        surrogate = SurrogateScreen(
+            candidates=SURROGATE_CANDIDATES,
+            eval_fraction=SURROGATE_EVAL_FRACTION,
+            refit_every=SURROGATE_REFIT_EVERY,
+            trust_threshold=SURROGATE_TRUST,
+            max_samples=SURROGATE_MAX_SAMPLES
+        ) if SURROGATE else None
+        fidelity = MultiFidelityScreen(
+            ObjectiveFunction(coarse_parser, scheduler),
+            promote_fraction=PROMOTE_FRACTION,
+            trust_threshold=FIDELITY_TRUST,
+            control=FIDELITY_CONTROL,
+            window=FIDELITY_WINDOW
+        ) if coarse_parser is not None else None
+        monitor = ConvergenceMonitor(
+            diversity_tol=DIVERSITY_TOL,
+            spread_tol=SPREAD_TOL,
+            stagnation_gens=STAGNATION_GENS,
+            stagnation_tol=STAGNATION_TOL,
+            max_evaluations=MAX_EVALUATIONS,
+            max_wall_time=MAX_WALL_TIME,
+            max_coarse_evaluations=MAX_COARSE_EVALUATIONS
+        )
         # 运行优化算法
         best_x, best_f = de(
             objective_func=objective_func,
@@ -136,12 +375,30 @@ def main():
             gens=GENERATIONS,
             F=F,
             CR=CR,
-            parallel=PARALLEL
+            parallel=PARALLEL,
+            init_method=INIT_METHOD,
+            asynchronous=ASYNC_DE,
+            surrogate=surrogate,
+            checkpointer=checkpointer,
+            resume_state=resume_state,
+            max_workers=scheduler.max_jobs,
+            strategy=DE_STRATEGY,
+            adaptation=ADAPTATION,
+            bound_handling=BOUND_HANDLING,
+            seed=DE_SEED,
+            monitor=monitor,
+            restarts=RESTARTS,
+            restart_factor=RESTART_POP_FACTOR,
+            distributed=DISTRIBUTED,
+            fidelity=fidelity
         )
 
         # 调整最终结果方向
         final_fitness = best_f if OPTIMIZATION_DIRECTION == "min" else -best_f
 
+        run_log.event("run_end", duration=time.time() - start_time, best_x=[float(v) for v in best_x],
+                      best_f=float(final_fitness))
+
         # 输出最终结果
         print("\n" + "=" * 60)
         print(f"✅ 优化完成! 耗时: {time.time() - start_time:.2f}秒")
@@ -157,8 +414,24 @@ def main():
     except KeyboardInterrupt:
         print("Program interrupted by user")
 
+    finally:
+        if retention is not None:
+            retention.stop()
+
+
+def parse_args(argv):
+    """解析命令行参数: [--resume] [--spec 参数说明文件]"""
+    args = {"resume": "--resume" in argv, "spec_path": PARAM_SPEC_FILE}
+    if "--spec" in argv:
+        index = argv.index("--spec")
+        if index + 1 >= len(argv):
+            print("❌ --spec 需要指定参数说明文件")
+            sys.exit(1)
+        args["spec_path"] = argv[index + 1]
+    return args
+
 
 if __name__ == "__main__":
-    main()
+    main(**parse_args(sys.argv[1:]))
 
 
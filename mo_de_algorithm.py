@@ -0,0 +1,139 @@
+import numpy as np
+from config import MAX_CPU
+from evaluator import make_evaluator
+from de_algorithm import init_population
+from de_operators import TrialGenerator
+from run_log import run_log, log
+
+
+def fast_non_dominated_sort(objs):
+    """
+    快速非支配排序(基于NumPy广播计算支配矩阵)
+    :param objs: 目标值数组 (n, m)，均为最小化
+    :return: 每个个体的前沿等级 (0为Pareto前沿)
+    """
+    n = len(objs)
+    ranks = np.full(n, -1, dtype=int)
+
+    # 含inf的个体(仿真失败)统一放在最后一层
+    feasible = np.all(np.isfinite(objs), axis=1)
+    idx = np.nonzero(feasible)[0]
+    f = objs[idx]
+
+    # dominates[i, j]: i 支配 j
+    less_equal = np.all(f[:, None, :] <= f[None, :, :], axis=2)
+    less = np.any(f[:, None, :] < f[None, :, :], axis=2)
+    dominates = less_equal & less
+    dominated_count = dominates.sum(axis=0)
+
+    rank = 0
+    remaining = np.ones(len(idx), dtype=bool)
+    while remaining.any():
+        front = remaining & (dominated_count == 0)
+        ranks[idx[front]] = rank
+        remaining &= ~front
+        # 移除当前前沿后更新被支配计数
+        dominated_count = dominated_count - dominates[front].sum(axis=0)
+        dominated_count[~remaining] = -1
+        rank += 1
+
+    ranks[~feasible] = rank
+    return ranks
+
+
+def crowding_distance(objs):
+    """
+    计算同一前沿内个体的拥挤距离
+    :param objs: 目标值数组 (n, m)
+    :return: 拥挤距离 (n,)，边界个体为inf
+    """
+    n, m = objs.shape
+    distance = np.zeros(n)
+    if n <= 2:
+        distance[:] = np.inf
+        return distance
+
+    order = np.argsort(objs, axis=0)
+    sorted_objs = np.take_along_axis(objs, order, axis=0)
+    span = sorted_objs[-1] - sorted_objs[0]
+    span[span == 0] = 1.0
+
+    # 每个目标上相邻个体的归一化间距
+    gaps = (sorted_objs[2:] - sorted_objs[:-2]) / span
+    for k in range(m):
+        distance[order[1:-1, k]] += gaps[:, k]
+        distance[order[0, k]] = np.inf
+        distance[order[-1, k]] = np.inf
+    return distance
+
+
+def select_survivors(objs, count):
+    """按前沿等级和拥挤距离选出count个个体的序号"""
+    ranks = fast_non_dominated_sort(objs)
+    crowding = np.zeros(len(objs))
+    for rank in np.unique(ranks):
+        members = np.nonzero(ranks == rank)[0]
+        if np.all(np.isfinite(objs[members])):
+            crowding[members] = crowding_distance(objs[members])
+
+    # 先按等级升序，再按拥挤距离降序
+    order = np.lexsort((-crowding, ranks))
+    return order[:count]
+
+
+def mo_de(objective_func, bounds, pop_size=10, gens=20, F=0.5, CR=0.9, parallel=False,
+          init_method="random", max_workers=MAX_CPU, strategy="rand/1", bound_handling="reflect",
+          seed=None, distributed=False):
+    """
+    多目标差分进化算法 (DE变异/交叉 + NSGA-II环境选择)
+    :param objective_func: 目标函数，返回目标值向量(均为最小化)
+    :param bounds: 参数边界 [(min, max), ...]
+    :param pop_size: 种群大小
+    :param gens: 迭代次数
+    :param F: 缩放因子
+    :param CR: 交叉概率
+    :param parallel: 是否并行
+    :param init_method: 初始化方式 random/lhs/sobol
+    :param max_workers: 并行评估进程数
+    :param strategy: 变异策略 rand/1 / rand/2 (best类策略按非支配等级选取最优个体)
+    :param bound_handling: 边界处理方式 reflect/clip
+    :param seed: 随机数种子
+    :param distributed: 由远程工作节点评估(DistributedEvaluator)
+    :return: (Pareto前沿参数, Pareto前沿目标值)
+    """
+    generator = TrialGenerator(bounds, F, CR, strategy, None, bound_handling, seed)
+    if pop_size < generator.min_pop_size():
+        raise ValueError(f"变异策略 {strategy} 至少需要 {generator.min_pop_size()} 个个体")
+    with make_evaluator(objective_func, parallel, max_workers, distributed) as evaluator:
+        pop = init_population(bounds, pop_size, init_method, generator.rng)
+        if parallel:
+            log(f"⚙️ 并行评估初始种群 ({evaluator.max_workers}进程)")
+        with run_log.span("evaluate", gen=0, count=len(pop)):
+            objs = np.array(evaluator.map(list(pop)), dtype=float)
+
+        for gen in range(gens):
+            log(f"\n📘 Generation {gen + 1}/{gens}")
+
+            trial_pop = generator.generate(pop, fast_non_dominated_sort(objs))[0]
+
+            # 评估试验种群
+            if parallel:
+                log(f"⚙️ 并行评估 ({evaluator.max_workers}进程)")
+            with run_log.span("evaluate", gen=gen + 1, count=pop_size):
+                trial_objs = np.array(evaluator.map(list(trial_pop)), dtype=float)
+
+            # 父代与子代合并后做环境选择
+            merged_pop = np.vstack([pop, trial_pop])
+            merged_objs = np.vstack([objs, trial_objs])
+            survivors = select_survivors(merged_objs, pop_size)
+            pop = merged_pop[survivors]
+            objs = merged_objs[survivors]
+
+            front = fast_non_dominated_sort(objs) == 0
+            log(f"🔄 子代入选: {np.sum(survivors >= pop_size)}/{pop_size}")
+            log(f"🏅 Pareto前沿个体数: {np.sum(front)}")
+            run_log.event("generation", gen=gen + 1, front_size=int(np.sum(front)),
+                          accepted=int(np.sum(survivors >= pop_size)))
+
+    front = fast_non_dominated_sort(objs) == 0
+    return pop[front], objs[front]
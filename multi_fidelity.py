@@ -0,0 +1,76 @@
+import numpy as np
+from collections import deque
+from surrogate import rank_correlation
+from de_operators import make_rng
+from run_log import run_log, log
+
+
+class MultiFidelityScreen:
+    """
+    多保真度筛选: 试验向量先在粗网格模板上求解，每代只有最好的一部分在细网格模板上确认
+    另随机提升少量其余试验向量作为对照样本，按跨代累积的对照样本计算两级结果的秩相关系数，
+    相关性不足时下一代全部细网格评估
+    """
+
+    def __init__(self, coarse_objective, promote_fraction=0.3, trust_threshold=0.5, control=2,
+                 window=30):
+        """
+        :param coarse_objective: 粗网格目标函数(参数与细网格模板相同)
+        :param promote_fraction: 每代提升到细网格评估的比例
+        :param trust_threshold: 秩相关系数低于该值时下一代全部提升
+        :param control: 每代额外随机提升的对照试验向量数
+        :param window: 计算秩相关系数时保留的最近对照样本数(跨代累积)
+        """
+        self.objective = coarse_objective
+        self.promote_fraction = promote_fraction
+        self.trust_threshold = trust_threshold
+        self.control = control
+        self.trusted = True
+        self.correlations = []
+        self._pairs = deque(maxlen=window)   # 对照样本的 (粗网格值, 细网格值)
+        self._control_idx = set()
+
+    def promote(self, eval_idx, coarse_values, rng=None):
+        """
+        按粗网格结果选出提升到细网格的试验向量
+        只用最好的一部分会使秩相关系数偏低，因此另从其余试验向量中随机抽取对照样本
+        :param eval_idx: 粗网格评估的试验向量序号
+        :param coarse_values: 对应的粗网格目标值
+        :param rng: 抽取对照样本的随机数生成器 np.random.Generator
+        :return: (提升的序号, 对应的粗网格目标值)，最好的在前、对照样本在后
+        """
+        eval_idx = np.asarray(eval_idx)
+        coarse_values = np.asarray(coarse_values, dtype=float)
+        if not self.trusted or len(eval_idx) <= 1:
+            # 全部提升时每个试验向量都是无偏样本
+            self._control_idx = set(eval_idx.tolist())
+            return list(eval_idx), coarse_values
+
+        count = max(1, int(np.ceil(self.promote_fraction * len(eval_idx))))
+        # 粗网格求解失败(inf)的试验向量排在最后
+        order = np.argsort(coarse_values, kind="stable")
+        top, rest = np.sort(order[:count]), order[count:]
+        rng = rng if rng is not None else make_rng()
+        control = rng.choice(rest, size=min(self.control, len(rest)), replace=False)
+        keep = np.concatenate([top, np.sort(control)]).astype(int)
+        self._control_idx = set(eval_idx[control].tolist())
+        return list(eval_idx[keep]), coarse_values[keep]
+
+    def update(self, eval_idx, coarse_values, fine_values, gen):
+        """根据对照样本的粗/细网格结果更新秩相关系数和可信度"""
+        for i, coarse, fine in zip(eval_idx, coarse_values, fine_values):
+            if i in self._control_idx:
+                self._pairs.append((coarse, fine))
+        if not self._pairs:
+            return
+        coarse, fine = zip(*self._pairs)
+        correlation = rank_correlation(coarse, fine)
+        if correlation is None:
+            return
+        self.correlations.append(correlation)
+        self.trusted = correlation >= self.trust_threshold
+        log(f"📐 粗/细网格秩相关系数: {correlation:.2f} ({len(self._pairs)}个对照样本)")
+        run_log.event("fidelity", gen=gen, correlation=correlation, promoted=len(fine_values),
+                      samples=len(self._pairs))
+        if not self.trusted:
+            print(f"⚠️ 粗/细网格秩相关系数 {correlation:.2f} 过低，下一代全部细网格评估")
@@ -1,108 +1,294 @@
 import sys
 import os
+import json
+import argparse
 
+try:
+    # 必须在Abaqus Python环境中才能导入
+    from odbAccess import openOdb
+    from abaqusConstants import MISES
+    import numpy as np
+except ImportError:
+    openOdb = None
 
-def main():
-    if len(sys.argv) < 4:
-        print("Usage: abaqus python parse_odb.py <odb_file> <metric> <node_label>")
-        sys.exit(1)
+# 结果行的前缀，其余输出行均视为日志
+RESULT_PREFIX = "RESULT "
+
+
+def bulk_field_data(field):
+    """
+    以NumPy数组批量读取场输出
+    :return: (节点/单元标签数组, 数据数组)
+    """
+    blocks = getattr(field, 'bulkDataBlocks', None)
+    if blocks is None:
+        # 旧版本Abaqus没有bulkDataBlocks，退回逐值读取
+        values = field.values
+        labels = np.array([v.nodeLabel or v.elementLabel for v in values], dtype=int)
+        return labels, np.array([v.data for v in values], dtype=float)
+    if not blocks:
+        return np.zeros(0, dtype=int), np.zeros(0)
+
+    labels = []
+    data = []
+    for block in blocks:
+        block_labels = block.nodeLabels if len(block.nodeLabels) else block.elementLabels
+        labels.append(np.asarray(block_labels, dtype=int))
+        data.append(np.asarray(block.data, dtype=float))
+    return np.concatenate(labels), np.concatenate(data)
+
+
+def find_node(odb, node_label):
+    """在装配实例中查找指定标签的节点，未找到返回None"""
+    for instance in odb.rootAssembly.instances.values():
+        try:
+            return instance.getNodeFromLabel(node_label)
+        except Exception:
+            continue
+    return None
+
+
+def find_node_set(odb, name):
+    """查找节点集(先查装配级，再查各实例)，未找到返回None"""
+    name = name.upper()
+    assembly = odb.rootAssembly
+    if name in assembly.nodeSets:
+        return assembly.nodeSets[name]
+    for instance in assembly.instances.values():
+        if name in instance.nodeSets:
+            return instance.nodeSets[name]
+    return None
+
+
+def select_step(odb, step=None):
+    """按名称或序号选取分析步，默认第一个分析步"""
+    if step is None:
+        return next(iter(odb.steps.values()))
+    if str(step).lstrip('-').isdigit():
+        return list(odb.steps.values())[int(step)]
+    return odb.steps[step]
+
+
+def select_frame(odb, step=None, frame=-1):
+    """选取结果帧，默认第一个分析步的最后一帧"""
+    selected = select_step(odb, step)
+    if not selected.frames:
+        print("⚠ 无帧数据，分析可能失败")
+        return None
+    return selected.frames[int(frame)]
+
+
+def get_node_displacement(odb, frame, node_label):
+    """指定节点的位移幅值"""
+    if 'U' not in frame.fieldOutputs:
+        print("⚠ 未输出位移场(U)")
+        return float('inf')
+
+    # 先按节点区域取子集，避免遍历全部场值
+    disp_field = frame.fieldOutputs['U']
+    node = find_node(odb, node_label)
+    if node is not None:
+        disp_field = disp_field.getSubset(region=node)
+    labels, data = bulk_field_data(disp_field)
+    matches = np.nonzero(labels == node_label)[0]
+    if not len(matches):
+        print(f"⚠ 节点 {node_label} 位移未找到")
+        return float('inf')
+    return float(np.linalg.norm(data[matches[0]]))
+
+
+def get_max_displacement_magnitude(frame):
+    """全模型最大位移幅值"""
+    if 'U' not in frame.fieldOutputs:
+        print("⚠ 未输出位移场(U)")
+        return float('inf')
+    _, data = bulk_field_data(frame.fieldOutputs['U'])
+    if data.size == 0:
+        return float('inf')
+    return float(np.max(np.linalg.norm(data.reshape(len(data), -1), axis=1)))
+
+
+def get_max_stress(frame):
+    """最大Mises应力"""
+    if 'S' not in frame.fieldOutputs:
+        print("⚠ 未输出应力场(S)")
+        return float('inf')
+
+    # 取Mises标量场后批量读取，用NumPy求最大值
+    stress_field = frame.fieldOutputs['S']
+    _, mises = bulk_field_data(stress_field.getScalarField(invariant=MISES))
+    if mises.size == 0:
+        print(f"⚠ 应力场数据为空")
+        return float('inf')
+    return float(np.max(mises))
+
+
+def get_reaction_force(odb, frame, node_set=None):
+    """节点集(默认全模型)支反力合力的幅值"""
+    if 'RF' not in frame.fieldOutputs:
+        print("⚠ 未输出支反力场(RF)")
+        return float('inf')
 
-    odb_file = sys.argv[1]
-    metric = sys.argv[2]
-    node_label = int(sys.argv[3])
+    rf_field = frame.fieldOutputs['RF']
+    if node_set:
+        region = find_node_set(odb, node_set)
+        if region is None:
+            print(f"⚠ 节点集 {node_set} 未找到")
+            return float('inf')
+        rf_field = rf_field.getSubset(region=region)
+    _, data = bulk_field_data(rf_field)
+    if data.size == 0:
+        return 0.0
+    return float(np.linalg.norm(data.reshape(len(data), -1).sum(axis=0)))
 
+
+def get_volume(frame):
+    """模型体积(需输出单元体积EVOL)"""
+    if 'EVOL' not in frame.fieldOutputs:
+        print("⚠ 未输出单元体积(EVOL)")
+        return float('inf')
+    _, data = bulk_field_data(frame.fieldOutputs['EVOL'])
+    return float(np.sum(data))
+
+
+def get_mass(odb, step=None):
+    """模型质量(取历史输出中的MASS变量)"""
+    for region in select_step(odb, step).historyRegions.values():
+        if 'MASS' in region.historyOutputs:
+            return float(region.historyOutputs['MASS'].data[-1][1])
+    print("⚠ 未输出质量历史变量(MASS)")
+    return float('inf')
+
+
+def compute_metric(odb, frame, metric, node=2, step=None):
+    """
+    计算单个指标
+    max_stress / max_disp(节点node) / disp:<节点> / max_umag /
+    rf / rf:<节点集> / volume / mass
+    """
+    name, _, arg = metric.partition(':')
+    if name == "max_stress":
+        return get_max_stress(frame)
+    elif name == "max_disp":
+        return get_node_displacement(odb, frame, int(arg) if arg else node)
+    elif name == "disp":
+        return get_node_displacement(odb, frame, int(arg))
+    elif name == "max_umag":
+        return get_max_displacement_magnitude(frame)
+    elif name == "rf":
+        return get_reaction_force(odb, frame, arg or None)
+    elif name == "volume":
+        return get_volume(frame)
+    elif name == "mass":
+        return get_mass(odb, step)
+    else:
+        print(f"⚠ 未知指标类型: {metric}")
+        return float('inf')
+
+
+def extract_metrics(odb_path, metrics, node=2, step=None, frame=-1):
+    """
+    打开一次ODB，计算全部请求的指标
+    :return: {指标: 数值}，失败的指标为inf
+    """
+    results = {metric: float('inf') for metric in metrics}
     try:
-        # 确保在Abaqus Python环境中
-        from odbAccess import openOdb
-        import numpy as np
+        odb = openOdb(path=odb_path, readOnly=True)
+    except Exception as e:
+        print(f"❌ 打开ODB时出错: {e}")
+        return results
 
-        def get_max_displacement(odb_path, node_label=2):
+    try:
+        selected = select_frame(odb, step, frame)
+        if selected is None:
+            return results
+        for metric in metrics:
             try:
-                odb = openOdb(path=odb_path)
+                results[metric] = compute_metric(odb, selected, metric, node, step)
+            except Exception as e:
+                print(f"❌ 解析指标 {metric} 时出错: {e}")
+    except Exception as e:
+        print(f"❌ 选取结果帧时出错: {e}")
+    finally:
+        odb.close()
+    return results
 
-                # 获取第一个分析步
-                step = next(iter(odb.steps.values()))
-                if not step.frames:
-                    print("⚠ 无帧数据，分析可能失败")
-                    odb.close()
-                    return float('inf')
 
-                # 检查位移场
-                frame = step.frames[-1]
-                if 'U' not in frame.fieldOutputs:
-                    print("⚠ 未输出位移场(U)")
-                    odb.close()
-                    return float('inf')
+def parse_odb_metric(odb_path, metric="max_stress", node=2):
+    return extract_metrics(odb_path, [metric], node)[metric]
 
-                # 查找指定节点的位移
-                disp_field = frame.fieldOutputs['U']
-                node_disp = None
 
-                for value in disp_field.values:
-                    if value.nodeLabel == node_label:
-                        node_disp = value.data
-                        break
+def write_result(result):
+    """输出结果行(立即刷新，供调用方逐行读取)"""
+    sys.stdout.flush()
+    sys.__stdout__.write(f"{RESULT_PREFIX}{json.dumps(result)}\n")
+    sys.__stdout__.flush()
 
-                odb.close()
 
-                if node_disp is None:
-                    print(f"⚠ 节点 {node_label} 位移未找到")
-                    return float('inf')
+def handle_request(request):
+    """处理一次解析请求"""
+    return extract_metrics(
+        request["odb"],
+        request.get("metrics", ["max_stress"]),
+        int(request.get("node", 2)),
+        request.get("step"),
+        int(request.get("frame", -1))
+    )
 
-                return np.linalg.norm(node_disp)
 
-            except Exception as e:
-                print(f"❌ 解析位移时出错: {e}")
-                return float('inf')
+def serve():
+    """常驻解析服务: 从标准输入逐行读取JSON请求，每个请求返回一行结果"""
+    # 标准输入关闭(调用方进程退出)时服务自动结束
+    for line in iter(sys.stdin.readline, ''):
+        line = line.strip()
+        if not line:
+            continue
+        if line == "QUIT":
+            break
 
-        def get_max_stress(odb_path):
-            try:
-                odb = openOdb(path=odb_path)
-
-                # 获取第一个分析步
-                step = next(iter(odb.steps.values()))
-                if not step.frames:
-                    print("⚠ 无帧数据，分析可能失败")
-                    odb.close()
-                    return float('inf')
-
-                # 检查应力场
-                frame = step.frames[-1]
-                if 'S' not in frame.fieldOutputs:
-                    print("⚠ 未输出应力场(S)")
-                    odb.close()
-                    return float('inf')
-
-                # 计算最大Mises应力
-                stress_field = frame.fieldOutputs['S']
-                if stress_field.values is None:
-                    print(f"⚠ 应力场数据为空")
-                    return float('inf')
-
-                max_stress = max([v.mises for v in stress_field.values])
-                odb.close()
-                return max_stress
+        try:
+            result = handle_request(json.loads(line))
+        except Exception as e:
+            print(f"❌ 请求处理失败: {str(e)}")
+            result = {}
+        write_result(result)
 
-            except Exception as e:
-                print(f"❌ 解析应力时出错: {e}")
-                return float('inf')
-
-        def parse_odb_metric(odb_path, metric="max_stress", node=2):
-            if metric == "max_disp":
-                return get_max_displacement(odb_path, node_label=node)
-            elif metric == "max_stress":
-                return get_max_stress(odb_path)
-            else:
-                print(f"⚠ 未知指标类型: {metric}")
-                return float('inf')
-
-        result = parse_odb_metric(odb_file, metric, node_label)
-        # print(result)
-        sys.__stdout__.write(str(result))
 
-    except ImportError:
+def main():
+    if openOdb is None:
         print("❌ 错误: 必须在 Abaqus Python 环境中运行此脚本")
         sys.exit(1)
+
+    if len(sys.argv) >= 2 and sys.argv[1] == "--server":
+        serve()
+        return
+
+    # 兼容旧的调用方式: <odb_file> <metric> <node_label>
+    if len(sys.argv) == 4 and not sys.argv[2].startswith('-'):
+        result = parse_odb_metric(sys.argv[1], sys.argv[2], int(sys.argv[3]))
+        sys.__stdout__.write(str(result))
+        return
+
+    parser = argparse.ArgumentParser(
+        usage="abaqus python parse_odb.py <odb_file> --metrics max_stress,disp:2 "
+              "[--node N] [--step STEP] [--frame -1]\n"
+              "       abaqus python parse_odb.py --server"
+    )
+    parser.add_argument("odb_file")
+    parser.add_argument("--metrics", default="max_stress")
+    parser.add_argument("--node", type=int, default=2)
+    parser.add_argument("--step", default=None)
+    parser.add_argument("--frame", type=int, default=-1)
+    args = parser.parse_args()
+
+    try:
+        write_result(handle_request({
+            "odb": args.odb_file,
+            "metrics": [m for m in args.metrics.split(',') if m],
+            "node": args.node,
+            "step": args.step,
+            "frame": args.frame
+        }))
     except Exception as e:
         print(f"❌ 未知错误: {str(e)}")
         sys.exit(1)
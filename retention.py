@@ -0,0 +1,160 @@
+import os
+import json
+import zipfile
+import threading
+import numpy as np
+from config import (
+    RESULT_DIR,
+    JOB_PARAMS_FILE,
+    KEEP_TOP_K,
+    RETENTION_ACTION,
+    RETENTION_INTERVAL,
+    FAILED_JOB_KEEP
+)
+from mo_de_algorithm import fast_non_dominated_sort
+from run_log import run_log, log
+
+# 作业状态(由 abaqus_util.evaluate_design 写入作业目录的参数文件)
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+
+
+def read_job_info(run_dir):
+    """读取作业参数文件，不存在或不完整时返回None"""
+    try:
+        with open(os.path.join(run_dir, JOB_PARAMS_FILE), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_job_info(run_dir, info):
+    """原子写入作业参数文件(后台清理线程可能同时读取)"""
+    path = os.path.join(run_dir, JOB_PARAMS_FILE)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(info, f)
+    os.replace(tmp_path, path)
+
+
+class ResultRetention:
+    """
+    结果目录保留策略: 后台定期清理已完成作业的结果文件
+    最优的 keep_top_k 个作业保留全部文件，失败作业只保留日志，其余作业删除或压缩
+    """
+
+    def __init__(self, targets, directions, result_dir=RESULT_DIR, keep_top_k=KEEP_TOP_K,
+                 action=RETENTION_ACTION, interval=RETENTION_INTERVAL, failed_keep=FAILED_JOB_KEEP,
+                 template_hash=None):
+        """
+        :param targets: 排序使用的指标列表(多个指标时按非支配等级排序)
+        :param directions: 各指标的优化方向 min/max
+        :param keep_top_k: 保留全部文件的最优作业数
+        :param action: 非最优作业的处理方式 delete/compress
+        :param interval: 后台清理间隔(秒)
+        :param failed_keep: 失败作业保留的文件扩展名
+        :param template_hash: 只有该模板的作业参与最优排序(多保真度时排除粗网格作业)，None为全部作业
+        """
+        if action not in ("delete", "compress"):
+            raise ValueError(f"未知的结果保留方式: {action}")
+        self.targets = list(targets)
+        self.signs = np.array([-1.0 if d == "max" else 1.0 for d in directions])
+        self.result_dir = result_dir
+        self.keep_top_k = keep_top_k
+        self.action = action
+        self.interval = interval
+        self.failed_keep = tuple(ext.lower() for ext in failed_keep)
+        self.template_hash = template_hash
+        self.freed_bytes = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """启动后台清理线程"""
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """停止后台线程并做最后一次清理"""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        self.sweep()
+        if self.freed_bytes:
+            log(f"🧹 结果保留策略共释放 {self.freed_bytes / 1e6:.1f} MB")
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.sweep()
+            except Exception as e:
+                print(f"⚠️ 结果目录清理失败: {str(e)}")
+
+    def _scan(self):
+        """收集已结束且未清理的作业: [(作业名, 目录, 参数信息)]"""
+        if not os.path.isdir(self.result_dir):
+            return []
+        jobs = []
+        for job_name in sorted(os.listdir(self.result_dir)):
+            run_dir = os.path.join(self.result_dir, job_name)
+            if not os.path.isdir(run_dir):
+                continue
+            info = read_job_info(run_dir)
+            if info is None or info.get("status") not in (STATUS_DONE, STATUS_FAILED):
+                continue
+            jobs.append((job_name, run_dir, info))
+        return jobs
+
+    def _elite(self, jobs):
+        """按目标值选出最优的keep_top_k个已完成作业"""
+        done = [(name, info) for name, _, info in jobs if info["status"] == STATUS_DONE
+                and self.template_hash in (None, info.get("template_hash"))]
+        if not done or self.keep_top_k <= 0:
+            return set()
+
+        objs = np.array([[info.get("results", {}).get(t, np.inf) for t in self.targets]
+                         for _, info in done], dtype=float) * self.signs
+        objs[np.isnan(objs)] = np.inf
+        ranks = fast_non_dominated_sort(objs) if len(self.targets) > 1 else np.zeros(len(done), dtype=int)
+        order = np.lexsort((objs[:, 0], ranks))
+        return {done[i][0] for i in order[:self.keep_top_k]}
+
+    def sweep(self):
+        """清理一次: 非最优作业删除或压缩，失败作业只保留日志"""
+        jobs = self._scan()
+        elite = self._elite(jobs)
+        for job_name, run_dir, info in jobs:
+            if job_name in elite:
+                continue
+            keep = self.failed_keep if info["status"] == STATUS_FAILED else ()
+            state = f"{self.action}:{info['status']}"
+            if info.get("pruned") == state:
+                continue
+
+            freed = self._prune(run_dir, job_name, keep)
+            info["pruned"] = state
+            write_job_info(run_dir, info)
+            self.freed_bytes += freed
+            run_log.event("prune", job=job_name, action=self.action, status=info["status"], freed=freed)
+
+    def _prune(self, run_dir, job_name, keep):
+        """删除或压缩作业目录中除参数文件和保留文件外的全部文件，返回释放的字节数"""
+        archive = os.path.join(run_dir, f"{job_name}.zip")
+        files = [name for name in os.listdir(run_dir)
+                 if name not in (JOB_PARAMS_FILE, os.path.basename(archive))
+                 and not name.lower().endswith(keep)
+                 and os.path.isfile(os.path.join(run_dir, name))]
+        if not files:
+            return 0
+
+        before = sum(os.path.getsize(os.path.join(run_dir, name)) for name in files)
+        archived = os.path.getsize(archive) if os.path.exists(archive) else 0
+        if self.action == "compress":
+            with zipfile.ZipFile(archive, 'a', compression=zipfile.ZIP_DEFLATED) as zf:
+                for name in files:
+                    zf.write(os.path.join(run_dir, name), name)
+        for name in files:
+            os.remove(os.path.join(run_dir, name))
+        after = os.path.getsize(archive) if self.action == "compress" else archived
+        return before - (after - archived)
@@ -0,0 +1,78 @@
+import os
+import json
+import time
+from contextlib import contextmanager
+from config import VERBOSITY, RUN_LOG_ENABLED, RUN_LOG_PATH
+
+# 控制台输出级别
+QUIET = 0     # 只输出错误和警告
+INFO = 1      # 优化进度(每代一次)
+DEBUG = 2     # 每个作业的详细信息及INP内容预览
+
+
+def log(message, level=INFO):
+    """按输出级别打印控制台信息"""
+    if VERBOSITY >= level:
+        print(message)
+
+
+def debug(message):
+    log(message, DEBUG)
+
+
+class RunLog:
+    """
+    结构化运行日志: 每行一个JSON记录(阶段耗时span、事件event)
+    各进程以追加方式写入同一文件，每条记录单独一次写入
+    """
+
+    def __init__(self, path=RUN_LOG_PATH):
+        """:param path: 日志文件路径，None为不记录"""
+        self.path = path
+        self._file = None
+        self._pid = None
+
+    def _handle(self):
+        # 每个进程使用自己的文件句柄(fork出的子进程不共用父进程的缓冲区)
+        if self._file is None or self._pid != os.getpid():
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._file = open(self.path, 'a', encoding='utf-8', buffering=1)
+            self._pid = os.getpid()
+        return self._file
+
+    def write(self, record):
+        if self.path is None:
+            return
+        record = {"time": time.time(), "pid": os.getpid(), **record}
+        try:
+            self._handle().write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+        except OSError as e:
+            print(f"⚠️ 写入运行日志失败: {str(e)}")
+
+    @contextmanager
+    def span(self, stage, **fields):
+        """
+        记录一个阶段的耗时
+        :param stage: 阶段名称，如 render/queue/solve/extract
+        :param fields: 附加字段(如作业名)，块内可向返回的字典追加字段
+        """
+        start = time.time()
+        status = "ok"
+        try:
+            yield fields
+        except BaseException:
+            status = "error"
+            raise
+        finally:
+            self.write({"type": "span", "stage": stage, "start": start,
+                        "duration": time.time() - start, "status": status, **fields})
+
+    def event(self, name, **fields):
+        """记录一个事件(如每代的最优值)"""
+        self.write({"type": "event", "event": name, **fields})
+
+    def __getstate__(self):
+        return {"path": self.path, "_file": None, "_pid": None}
+
+
+run_log = RunLog(RUN_LOG_PATH if RUN_LOG_ENABLED else None)
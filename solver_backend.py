@@ -0,0 +1,389 @@
+import os
+import re
+import time
+import random
+import numpy as np
+from config import FAKE_SOLVE_LATENCY, FAKE_LATENCY_JITTER, PARALLEL_FRACTION, NODE_LABEL, ODB_STEP, ODB_FRAME
+
+# 本地替代求解器支持的单元类型(三节点常应变三角形单元)
+PLANE_STRESS_TYPES = ("CPS3",)
+PLANE_STRAIN_TYPES = ("CPE3",)
+
+# *BOUNDARY 中边界类型对应的平面自由度
+BOUNDARY_TYPES = {
+    "ENCASTRE": (1, 2),
+    "PINNED": (1, 2),
+    "XSYMM": (1, 1),
+    "YSYMM": (2, 2),
+}
+
+
+class SolverBackend:
+    """
+    求解器后端接口: 运行作业并从结果文件提取指标
+    run_job 返回 (是否成功, 结果文件路径)，extract_metrics 返回 {指标: 数值}
+    """
+
+    name = "base"
+
+    def __init__(self, node=NODE_LABEL, step=ODB_STEP, frame=ODB_FRAME):
+        """
+        结果位置(同一设计在不同位置提取的指标不同，也用于区分缓存)
+        :param node: max_disp指标的默认节点
+        :param step: 提取结果的分析步
+        :param frame: 提取结果的帧
+        """
+        self.node = node
+        self.step = step
+        self.frame = frame
+
+    def result_path(self, run_dir, job_name):
+        """作业结果文件路径"""
+        raise NotImplementedError
+
+    def run_job(self, run_dir, job_name, cpus=1, total_time=None):
+        """:param total_time: 分析步总时间(用于作业监视预测耗时)，None时由后端自行确定"""
+        raise NotImplementedError
+
+    def extract_metrics(self, result_path, metrics):
+        raise NotImplementedError
+
+
+class InpModel:
+    """从INP文件读取的二维线弹性模型(展开*INCLUDE，实例名前缀按单一部件处理)"""
+
+    def __init__(self, inp_path):
+        self.nodes = {}          # 节点标签 -> (x, y)
+        self.elements = []       # (单元标签, 单元类型, 节点标签元组)
+        self.elsets = {}         # 单元集 -> 单元标签集合
+        self.nsets = {}          # 节点集 -> 节点标签列表
+        self.materials = {}      # 材料名 -> {"E":, "nu":, "density":}
+        self.sections = []       # (单元集, 材料名, 厚度)
+        self.boundaries = []     # (节点引用, 起始自由度, 终止自由度, 位移值)
+        self.loads = []          # (节点引用, 自由度, 载荷值)
+        self._parse(self._read_lines(inp_path))
+
+    @classmethod
+    def _read_lines(cls, path):
+        """读取INP文件并展开*INCLUDE"""
+        lines = []
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            for line in f:
+                match = re.match(r'\s*\*INCLUDE\s*,\s*INPUT\s*=\s*(.+?)\s*$', line, re.IGNORECASE)
+                if match:
+                    include = match.group(1).strip('"')
+                    if not os.path.isabs(include):
+                        include = os.path.join(os.path.dirname(path), include)
+                    lines.extend(cls._read_lines(include))
+                else:
+                    lines.append(line)
+        return lines
+
+    @staticmethod
+    def _keyword(line):
+        parts = [p.strip() for p in line.strip().rstrip(',').split(',')]
+        params = {}
+        for part in parts[1:]:
+            key, _, value = part.partition('=')
+            params[key.strip().upper()] = value.strip()
+        return parts[0].upper(), params
+
+    @staticmethod
+    def _fields(line):
+        return [f.strip() for f in line.strip().rstrip(',').split(',') if f.strip()]
+
+    def _parse(self, lines):
+        keyword, params = None, {}
+        material = None
+        for line in lines:
+            if line.startswith('**') or not line.strip():
+                continue
+            if line.startswith('*'):
+                keyword, params = self._keyword(line)
+                if keyword == "*MATERIAL":
+                    material = params.get("NAME", "").upper()
+                    self.materials[material] = {"E": None, "nu": 0.0, "density": None}
+                elif keyword == "*SOLID SECTION":
+                    self.sections.append([params.get("ELSET", "").upper(),
+                                          params.get("MATERIAL", "").upper(), 1.0])
+                continue
+
+            fields = self._fields(line)
+            if keyword == "*NODE":
+                self.nodes[int(fields[0])] = (float(fields[1]), float(fields[2]))
+            elif keyword == "*ELEMENT":
+                label = int(fields[0])
+                self.elements.append((label, params.get("TYPE", "").upper(),
+                                      tuple(int(n) for n in fields[1:])))
+                if "ELSET" in params:
+                    self.elsets.setdefault(params["ELSET"].upper(), set()).add(label)
+            elif keyword == "*ELSET":
+                self.elsets.setdefault(params["ELSET"].upper(), set()).update(
+                    self._set_members(fields, "GENERATE" in params))
+            elif keyword == "*NSET":
+                members = self.nsets.setdefault(params["NSET"].upper(), [])
+                for label in self._set_members(fields, "GENERATE" in params):
+                    if label not in members:
+                        members.append(label)
+            elif keyword == "*ELASTIC" and material:
+                self.materials[material]["E"] = float(fields[0])
+                self.materials[material]["nu"] = float(fields[1]) if len(fields) > 1 else 0.0
+            elif keyword == "*DENSITY" and material:
+                self.materials[material]["density"] = float(fields[0])
+            elif keyword == "*SOLID SECTION" and fields:
+                self.sections[-1][2] = float(fields[0])
+            elif keyword == "*BOUNDARY":
+                kind = fields[1].upper()
+                if kind in BOUNDARY_TYPES:
+                    first, last = BOUNDARY_TYPES[kind]
+                    value = 0.0
+                else:
+                    first = int(fields[1])
+                    last = int(fields[2]) if len(fields) > 2 else first
+                    value = float(fields[3]) if len(fields) > 3 else 0.0
+                self.boundaries.append((fields[0], first, last, value))
+            elif keyword == "*CLOAD":
+                self.loads.append((fields[0], int(fields[1]), float(fields[2])))
+
+    @staticmethod
+    def _set_members(fields, generate):
+        if generate:
+            start, end = int(fields[0]), int(fields[1])
+            step = int(fields[2]) if len(fields) > 2 else 1
+            return list(range(start, end + 1, step))
+        return [int(f) for f in fields]
+
+    def resolve_nodes(self, ref):
+        """节点引用(标签、实例.标签或节点集名)对应的节点标签列表"""
+        name = ref.split('.')[-1].strip()
+        if name.isdigit():
+            return [int(name)]
+        return self.nsets.get(name.upper(), [])
+
+
+class PlaneSolution:
+    """二维常应变三角形单元线弹性静力求解"""
+
+    def __init__(self, model):
+        self.model = model
+        self.labels = np.array(sorted(model.nodes), dtype=int)
+        index = {label: i for i, label in enumerate(self.labels)}
+        self.coords = np.array([model.nodes[label] for label in self.labels], dtype=float)
+
+        for _, etype, _ in model.elements:
+            if etype not in PLANE_STRESS_TYPES + PLANE_STRAIN_TYPES:
+                raise ValueError(f"本地替代求解器不支持单元类型 {etype}")
+        self.element_labels = np.array([e[0] for e in model.elements], dtype=int)
+        self.connectivity = np.array([[index[n] for n in e[2][:3]] for e in model.elements], dtype=int)
+        self.E, self.nu, self.thickness, self.density = self._element_properties()
+        self.plane_strain = np.array([e[1] in PLANE_STRAIN_TYPES for e in model.elements])
+
+    def _element_properties(self):
+        """按截面定义为每个单元取材料参数和厚度"""
+        count = len(self.model.elements)
+        E = np.full(count, np.nan)
+        nu = np.zeros(count)
+        thickness = np.ones(count)
+        density = np.full(count, np.nan)
+        position = {label: i for i, label in enumerate(self.element_labels)}
+        for elset, material, t in self.model.sections:
+            props = self.model.materials.get(material)
+            if props is None or props["E"] is None:
+                raise ValueError(f"材料 {material} 缺少弹性参数")
+            for label in self.model.elsets.get(elset, ()):
+                i = position[label]
+                E[i], nu[i], thickness[i] = props["E"], props["nu"], t
+                density[i] = props["density"] if props["density"] is not None else np.nan
+        if np.isnan(E).any():
+            raise ValueError("存在未定义截面的单元")
+        return E, nu, thickness, density
+
+    def _b_matrices(self):
+        """各单元的面积和应变-位移矩阵B (n, 3, 6)"""
+        xy = self.coords[self.connectivity]
+        x, y = xy[:, :, 0], xy[:, :, 1]
+        b = np.stack([y[:, 1] - y[:, 2], y[:, 2] - y[:, 0], y[:, 0] - y[:, 1]], axis=1)
+        c = np.stack([x[:, 2] - x[:, 1], x[:, 0] - x[:, 2], x[:, 1] - x[:, 0]], axis=1)
+        area = 0.5 * (b[:, 0] * c[:, 1] - b[:, 1] * c[:, 0])
+        if np.any(np.abs(area) < 1e-12):
+            raise ValueError("单元面积为零(节点共线)")
+
+        B = np.zeros((len(xy), 3, 6))
+        B[:, 0, 0::2] = b
+        B[:, 1, 1::2] = c
+        B[:, 2, 0::2] = c
+        B[:, 2, 1::2] = b
+        return np.abs(area), B / (2 * area[:, None, None])
+
+    def _d_matrices(self):
+        """平面应力/平面应变弹性矩阵D (n, 3, 3)"""
+        E, nu = self.E, self.nu
+        D = np.zeros((len(E), 3, 3))
+        stress = ~self.plane_strain
+        k = E[stress] / (1 - nu[stress] ** 2)
+        D[stress, 0, 0] = D[stress, 1, 1] = k
+        D[stress, 0, 1] = D[stress, 1, 0] = k * nu[stress]
+        D[stress, 2, 2] = k * (1 - nu[stress]) / 2
+        strain = self.plane_strain
+        k = E[strain] / ((1 + nu[strain]) * (1 - 2 * nu[strain]))
+        D[strain, 0, 0] = D[strain, 1, 1] = k * (1 - nu[strain])
+        D[strain, 0, 1] = D[strain, 1, 0] = k * nu[strain]
+        D[strain, 2, 2] = k * (1 - 2 * nu[strain]) / 2
+        return D
+
+    def solve(self):
+        """组装刚度矩阵并求解，返回 (节点位移, 单元Mises应力, 节点支反力)"""
+        n_dof = 2 * len(self.labels)
+        area, B = self._b_matrices()
+        D = self._d_matrices()
+        Ke = np.einsum('e,eji,ejk,ekl->eil', area * self.thickness, B, D, B)
+
+        dofs = np.repeat(2 * self.connectivity, 2, axis=1) + np.tile([0, 1], 3)
+        K = np.zeros((n_dof, n_dof))
+        np.add.at(K, (dofs[:, :, None], dofs[:, None, :]), Ke)
+
+        index = {label: i for i, label in enumerate(self.labels)}
+        f = np.zeros(n_dof)
+        for ref, dof, value in self.model.loads:
+            for label in self.model.resolve_nodes(ref):
+                if dof <= 2:
+                    f[2 * index[label] + dof - 1] += value
+
+        u = np.zeros(n_dof)
+        fixed = np.zeros(n_dof, dtype=bool)
+        for ref, first, last, value in self.model.boundaries:
+            for label in self.model.resolve_nodes(ref):
+                for dof in range(first, min(last, 2) + 1):
+                    fixed[2 * index[label] + dof - 1] = True
+                    u[2 * index[label] + dof - 1] = value
+
+        free = ~fixed
+        rhs = f[free] - K[np.ix_(free, fixed)] @ u[fixed]
+        u[free] = np.linalg.solve(K[np.ix_(free, free)], rhs)
+
+        strain = np.einsum('eij,ej->ei', B, u[dofs])
+        sigma = np.einsum('eij,ej->ei', D, strain)
+        sx, sy, txy = sigma[:, 0], sigma[:, 1], sigma[:, 2]
+        szz = np.where(self.plane_strain, self.nu * (sx + sy), 0.0)
+        mises = np.sqrt(0.5 * ((sx - sy) ** 2 + (sy - szz) ** 2 + (szz - sx) ** 2) + 3 * txy ** 2)
+
+        reaction = np.where(fixed, K @ u - f, 0.0)
+        return u.reshape(-1, 2), mises, reaction.reshape(-1, 2), area
+
+
+class AbaqusBackend(SolverBackend):
+    """调用Abaqus求解并通过ODB解析服务提取指标"""
+
+    name = "abaqus"
+
+    def __init__(self, run_job, extract_metrics, node=NODE_LABEL, step=ODB_STEP, frame=ODB_FRAME):
+        """
+        :param run_job: 作业运行函数 run_job(run_dir, job_name, cpus=1, total_time=None)
+        :param extract_metrics: ODB指标提取函数 extract_metrics(odb_path, metrics, node=, step=, frame=)
+        """
+        super().__init__(node, step, frame)
+        self._run_job = run_job
+        self._extract_metrics = extract_metrics
+
+    def result_path(self, run_dir, job_name):
+        return os.path.join(run_dir, f"{job_name}.odb")
+
+    def run_job(self, run_dir, job_name, cpus=1, total_time=None):
+        return self._run_job(run_dir, job_name, cpus=cpus, total_time=total_time)
+
+    def extract_metrics(self, result_path, metrics):
+        return self._extract_metrics(result_path, metrics, node=self.node, step=self.step, frame=self.frame)
+
+
+class FakeAbaqusBackend(SolverBackend):
+    """
+    本地替代求解器: 按设定延迟模拟求解耗时，用NumPy求解二维三角形单元模型
+    不需要Abaqus许可证即可测试和测量调度、缓存及DE算法的开销
+    """
+
+    name = "fake"
+
+    def __init__(self, latency=FAKE_SOLVE_LATENCY, jitter=FAKE_LATENCY_JITTER,
+                 parallel_fraction=PARALLEL_FRACTION, node=NODE_LABEL, step=ODB_STEP, frame=ODB_FRAME):
+        """
+        :param latency: 单核求解耗时(秒)
+        :param jitter: 耗时的相对随机波动(0.2为±20%)
+        :param parallel_fraction: 多核加速的可并行比例(与调度器的Amdahl模型一致)
+        :param node: max_disp指标的默认节点
+        :param step: 分析步(本地求解只有一个结果，仅用于区分缓存)
+        :param frame: 帧(同上)
+        """
+        super().__init__(node, step, frame)
+        self.latency = latency
+        self.jitter = jitter
+        self.parallel_fraction = parallel_fraction
+        # 独立的随机数生成器，不影响优化算法的随机序列
+        self._rng = random.Random()
+
+    def result_path(self, run_dir, job_name):
+        return os.path.join(run_dir, f"{job_name}.npz")
+
+    def solve_time(self, cpus=1):
+        p = self.parallel_fraction
+        factor = 1 + self.jitter * self._rng.uniform(-1, 1)
+        return self.latency * ((1 - p) + p / max(1, cpus)) * factor
+
+    def run_job(self, run_dir, job_name, cpus=1, total_time=None):
+        inp_path = os.path.join(run_dir, f"{job_name}.inp")
+        if not os.path.isfile(inp_path):
+            print(f"❌ 未找到INP文件: {inp_path}")
+            return False, None
+
+        start = time.time()
+        try:
+            solution = PlaneSolution(InpModel(inp_path))
+            u, mises, reaction, area = solution.solve()
+        except (ValueError, KeyError, IndexError, np.linalg.LinAlgError) as e:
+            print(f"❌ 本地求解失败: {str(e)}")
+            return False, None
+
+        # 补足模拟的求解耗时
+        remaining = self.solve_time(cpus) - (time.time() - start)
+        if remaining > 0:
+            time.sleep(remaining)
+
+        result_path = self.result_path(run_dir, job_name)
+        node_sets = {f"nset_{name}": np.array(labels, dtype=int)
+                     for name, labels in solution.model.nsets.items()}
+        np.savez(result_path, labels=solution.labels, u=u, mises=mises, reaction=reaction,
+                 volume=area * solution.thickness, density=solution.density, **node_sets)
+        return True, result_path
+
+    def extract_metrics(self, result_path, metrics):
+        results = {metric: float('inf') for metric in metrics}
+        try:
+            data = np.load(result_path)
+        except (OSError, ValueError) as e:
+            print(f"❌ 读取结果文件时出错: {e}")
+            return results
+
+        labels = data["labels"]
+        for metric in metrics:
+            name, _, arg = metric.partition(':')
+            if name == "max_stress":
+                results[metric] = float(np.max(data["mises"]))
+            elif name in ("max_disp", "disp"):
+                node = int(arg) if arg else self.node
+                matches = np.nonzero(labels == node)[0]
+                if len(matches):
+                    results[metric] = float(np.linalg.norm(data["u"][matches[0]]))
+            elif name == "max_umag":
+                results[metric] = float(np.max(np.linalg.norm(data["u"], axis=1)))
+            elif name == "rf" and (not arg or f"nset_{arg.upper()}" in data):
+                mask = np.isin(labels, data[f"nset_{arg.upper()}"]) if arg else slice(None)
+                results[metric] = float(np.linalg.norm(data["reaction"][mask].sum(axis=0)))
+            elif name == "volume":
+                results[metric] = float(np.sum(data["volume"]))
+            elif name == "mass":
+                if np.isnan(data["density"]).any():
+                    print("⚠ 材料未定义密度(*DENSITY)")
+                else:
+                    results[metric] = float(np.sum(data["volume"] * data["density"]))
+            else:
+                print(f"⚠ 本地替代求解器不支持指标: {metric}")
+        return results
@@ -0,0 +1,119 @@
+import time
+import numpy as np
+
+
+class ConvergenceMonitor:
+    """
+    收敛检测与计算预算: 种群多样性、适应度分布范围、最优值停滞，以及评估次数和运行时间上限
+    计数随检查点一起保存，恢复运行后继续累计
+    """
+
+    def __init__(self, diversity_tol=None, spread_tol=None, stagnation_gens=None, stagnation_tol=0.0,
+                 max_evaluations=None, max_wall_time=None, max_coarse_evaluations=None):
+        """
+        :param diversity_tol: 各维标准差与参数范围之比的均值低于该值时视为收敛
+        :param spread_tol: 适应度最大最小值之差(相对最优值)低于该值时视为收敛
+        :param stagnation_gens: 连续多少代最优值改进不超过stagnation_tol时视为停滞
+        :param stagnation_tol: 停滞判定的相对改进量
+        :param max_evaluations: 真实评估次数上限(包括所有重启)
+        :param max_wall_time: 运行时间上限(秒)
+        :param max_coarse_evaluations: 多保真度粗网格评估次数上限(单独计数，不计入max_evaluations)
+        参数为None时不检查对应条件
+        """
+        self.diversity_tol = diversity_tol
+        self.spread_tol = spread_tol
+        self.stagnation_gens = stagnation_gens
+        self.stagnation_tol = stagnation_tol
+        self.max_evaluations = max_evaluations
+        self.max_wall_time = max_wall_time
+        self.max_coarse_evaluations = max_coarse_evaluations
+        self.evaluations = 0
+        self.coarse_evaluations = 0
+        self.restarts = 0
+        self.history = []        # 当前轮次每代的最优值
+        self._elapsed = 0.0      # 之前运行(恢复前)累计的时间
+        self._clock = time.time()
+
+    def restore(self, saved):
+        """从检查点中的监视器恢复计数(判定阈值使用当前配置)"""
+        self.evaluations = saved.evaluations
+        self.coarse_evaluations = getattr(saved, "coarse_evaluations", 0)
+        self.restarts = saved.restarts
+        self.history = list(saved.history)
+        self._elapsed = saved._elapsed
+        self._clock = time.time()
+
+    def wall_time(self):
+        return self._elapsed + time.time() - self._clock
+
+    def add_evaluations(self, count):
+        self.evaluations += count
+
+    def add_coarse_evaluations(self, count):
+        self.coarse_evaluations += count
+
+    def remaining_evaluations(self):
+        """剩余的评估次数，无上限时返回None"""
+        if self.max_evaluations is None:
+            return None
+        return max(0, self.max_evaluations - self.evaluations)
+
+    def remaining_coarse_evaluations(self):
+        """剩余的粗网格评估次数，无上限时返回None"""
+        if self.max_coarse_evaluations is None:
+            return None
+        return max(0, self.max_coarse_evaluations - self.coarse_evaluations)
+
+    def budget_reason(self):
+        """计算预算是否用完，返回停止原因或None"""
+        if self.max_evaluations is not None and self.evaluations >= self.max_evaluations:
+            return "max_evaluations"
+        if self.max_coarse_evaluations is not None and self.coarse_evaluations >= self.max_coarse_evaluations:
+            return "max_coarse_evaluations"
+        if self.max_wall_time is not None and self.wall_time() >= self.max_wall_time:
+            return "max_wall_time"
+        return None
+
+    def convergence_reason(self, pop, fitness, bounds):
+        """种群是否已收敛，返回停止原因或None"""
+        if self.diversity_tol is not None:
+            span = np.array([b[1] - b[0] for b in bounds], dtype=float)
+            span[span == 0] = 1.0
+            if np.mean(np.std(pop, axis=0) / span) < self.diversity_tol:
+                return "diversity"
+
+        finite = fitness[np.isfinite(fitness)]
+        if self.spread_tol is not None and len(finite) > 1:
+            if finite.max() - finite.min() <= self.spread_tol * max(1.0, abs(finite.min())):
+                return "spread"
+
+        n = self.stagnation_gens
+        if n is not None and len(self.history) > n:
+            old, new = self.history[-n - 1], self.history[-1]
+            if np.isfinite(new) and old - new <= self.stagnation_tol * max(1.0, abs(new)):
+                return "stagnation"
+        return None
+
+    def update(self, pop, fitness, bounds):
+        """每代结束时调用，返回停止原因(预算优先)或None"""
+        self.history.append(float(np.min(fitness)))
+        return self.budget_reason() or self.convergence_reason(pop, fitness, bounds)
+
+    def start_restart(self):
+        """开始新一轮重启，清空停滞历史"""
+        self.restarts += 1
+        self.history = []
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_elapsed"] = self.wall_time()
+        state["_clock"] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._clock = time.time()
+
+
+# 属于计算预算的停止原因(不触发重启)
+BUDGET_REASONS = ("max_evaluations", "max_coarse_evaluations", "max_wall_time")
@@ -0,0 +1,160 @@
+import numpy as np
+
+
+def rank_correlation(a, b):
+    """两组数值的秩相关系数(Spearman)，有效样本少于3个或无法计算时返回None"""
+    a = np.asarray(a, dtype=float)
+    b = np.asarray(b, dtype=float)
+    mask = np.isfinite(a) & np.isfinite(b)
+    if mask.sum() < 3:
+        return None
+    rank_a = np.argsort(np.argsort(a[mask]))
+    rank_b = np.argsort(np.argsort(b[mask]))
+    correlation = np.corrcoef(rank_a, rank_b)[0, 1]
+    return float(correlation) if np.isfinite(correlation) else None
+
+
+class RBFSurrogate:
+    """三次径向基函数代理模型(带线性多项式尾项)"""
+
+    def __init__(self, bounds):
+        self.lower = np.array([b[0] for b in bounds], dtype=float)
+        self.span = np.array([b[1] - b[0] for b in bounds], dtype=float)
+        self.span[self.span == 0] = 1.0
+        self.centers = None
+        self.weights = None
+        self.y_mean = 0.0
+        self.y_std = 1.0
+
+    def _normalize(self, X):
+        return (np.asarray(X, dtype=float) - self.lower) / self.span
+
+    @staticmethod
+    def _kernel(A, B):
+        # 用 |a|^2+|b|^2-2a·b 计算距离，避免构造 (n, m, dim) 的差值数组
+        sq = np.sum(A ** 2, axis=1)[:, None] + np.sum(B ** 2, axis=1)[None, :] - 2.0 * (A @ B.T)
+        r = np.sqrt(np.maximum(sq, 0.0))
+        return r ** 3
+
+    def fit(self, X, y):
+        """用已评估样本拟合模型"""
+        X = self._normalize(X)
+        y = np.asarray(y, dtype=float)
+        self.y_mean = y.mean()
+        self.y_std = y.std() or 1.0
+        y = (y - self.y_mean) / self.y_std
+
+        n, dim = X.shape
+        P = np.hstack([np.ones((n, 1)), X])
+        A = np.zeros((n + dim + 1, n + dim + 1))
+        A[:n, :n] = self._kernel(X, X)
+        A[:n, n:] = P
+        A[n:, :n] = P.T
+        rhs = np.concatenate([y, np.zeros(dim + 1)])
+        try:
+            self.weights = np.linalg.solve(A, rhs)
+        except np.linalg.LinAlgError:
+            # 重复样本导致矩阵奇异时使用最小二乘解
+            self.weights = np.linalg.lstsq(A, rhs, rcond=None)[0]
+        self.centers = X
+
+    def predict(self, X):
+        """预测目标值"""
+        X = self._normalize(np.atleast_2d(X))
+        n = len(self.centers)
+        P = np.hstack([np.ones((len(X), 1)), X])
+        values = self._kernel(X, self.centers) @ self.weights[:n] + P @ self.weights[n:]
+        return values * self.y_std + self.y_mean
+
+
+class SurrogateScreen:
+    """代理模型预筛选: 每个目标个体生成多个候选，只对最有希望的试验向量运行仿真"""
+
+    def __init__(self, candidates=4, eval_fraction=0.5, refit_every=1, min_samples=None,
+                 trust_threshold=0.3, max_samples=200):
+        """
+        :param candidates: 每个目标个体生成的候选试验向量数
+        :param eval_fraction: 每代真实评估的试验向量比例
+        :param refit_every: 每隔多少代重新拟合模型
+        :param min_samples: 启用代理模型所需的最少样本数(默认 2*维数+2)
+        :param trust_threshold: 预测与真实值的秩相关系数低于该值时，下一代全部真实评估
+        :param max_samples: 样本库上限，超出时保留最好的一半和最近的样本(拟合为O(n³))
+        """
+        self.candidates = candidates
+        self.eval_fraction = eval_fraction
+        self.refit_every = refit_every
+        self.min_samples = min_samples
+        self.trust_threshold = trust_threshold
+        self.max_samples = max_samples
+        self.archive_x = []
+        self.archive_y = []
+        self.model = None
+        self.trusted = True
+        self._last_fit_gen = None
+
+    def record(self, xs, ys):
+        """将真实评估结果加入样本库(失败的评估不参与拟合)"""
+        for x, y in zip(xs, ys):
+            if np.isfinite(y):
+                self.archive_x.append(np.array(x, dtype=float))
+                self.archive_y.append(float(y))
+        self._trim()
+
+    def _trim(self):
+        """样本库超出上限时保留目标值最好的一半，其余名额留给最近的样本"""
+        if not self.max_samples or len(self.archive_y) <= self.max_samples:
+            return
+        best = np.argsort(self.archive_y, kind="stable")[:self.max_samples // 2]
+        keep = set(best.tolist())
+        for i in range(len(self.archive_y) - 1, -1, -1):
+            if len(keep) >= self.max_samples:
+                break
+            keep.add(i)
+        keep = sorted(keep)
+        self.archive_x = [self.archive_x[i] for i in keep]
+        self.archive_y = [self.archive_y[i] for i in keep]
+
+    def _refit(self, bounds, gen):
+        if self.model is None or self._last_fit_gen is None or gen - self._last_fit_gen >= self.refit_every:
+            self.model = RBFSurrogate(bounds)
+            self.model.fit(np.array(self.archive_x), np.array(self.archive_y))
+            self._last_fit_gen = gen
+
+    def screen(self, pop, fitness, bounds, make_trials, gen):
+        """
+        生成并筛选试验种群
+        :param make_trials: 试验种群生成函数 make_trials(pop)，返回 (pop_size, dim) 数组
+        :return: (试验种群, 需要真实评估的个体序号, 预测值或None)
+        """
+        pop_size, dim = pop.shape
+
+        # 样本不足时不使用代理模型
+        if len(self.archive_y) < (self.min_samples or 2 * dim + 2):
+            return make_trials(pop), list(range(pop_size)), None
+
+        self._refit(bounds, gen)
+
+        # 模型不可信时全部真实评估，同时记录预测值以重新检验可信度
+        if not self.trusted:
+            trial_pop = make_trials(pop)
+            return trial_pop, list(range(pop_size)), self.model.predict(trial_pop)
+
+        # 每个目标个体保留预测值最好的候选
+        candidates = np.stack([make_trials(pop) for _ in range(self.candidates)])
+        values = self.model.predict(candidates.reshape(-1, dim)).reshape(self.candidates, pop_size)
+        best = np.argmin(values, axis=0)
+        trial_pop = candidates[best, np.arange(pop_size)]
+        predicted = values[best, np.arange(pop_size)]
+
+        # 按预测改进量排序，只评估最有希望的一部分
+        count = max(1, int(np.ceil(self.eval_fraction * pop_size)))
+        improvement = predicted - np.where(np.isfinite(fitness), fitness, np.inf)
+        eval_idx = sorted(np.argsort(improvement)[:count])
+        return trial_pop, eval_idx, predicted
+
+    def update_trust(self, predicted, actual):
+        """根据预测值与真实值的秩相关系数更新模型可信度"""
+        correlation = rank_correlation(predicted, actual)
+        self.trusted = correlation is None or correlation >= self.trust_threshold
+        if not self.trusted:
+            print(f"⚠️ 代理模型秩相关系数 {correlation:.2f} 过低，下一代全部真实评估")
@@ -1,16 +1,43 @@
 import os
 import re
-from config import PROJECT_ROOT, TEMPLATE_FILE, RESULT_DIR
+import hashlib
+from config import (
+    PROJECT_ROOT,
+    TEMPLATE_FILE,
+    RESULT_DIR,
+    SCRATCH_DIR,
+    DEFAULT_PARAM_FORMAT,
+    PARAM_FORMATS,
+    SPLIT_INCLUDE,
+    INCLUDE_MIN_BYTES,
+    STATIC_DIR_NAME
+)
+from job_monitor import analysis_time
+from run_log import log, debug
+
+# Abaqus输入文件单行最大长度
+MAX_INP_LINE_LENGTH = 256
 
 
 class TemplateParser:
-    def __init__(self):
+    def __init__(self, template_file=TEMPLATE_FILE):
+        """:param template_file: 模板文件(相对项目目录)，如多保真度的粗网格模板"""
         # 修正正则表达式以匹配 ${param} 格式
         self.param_pattern = r"\${(\w+)}"
         self.param_map = {}
         self.template_content = ""
-        self.template_path = os.path.join(PROJECT_ROOT, TEMPLATE_FILE)
+        self.template_path = os.path.join(PROJECT_ROOT, template_file)
+        self.template_hash = ""
+        self.format_specs = dict(PARAM_FORMATS)
+        # 预编译结果: 字面文本片段与参数槽位(参数序号)交替
+        self._chunks = []
+        self._slots = []
+        # 拆分为*INCLUDE时的静态文件: [(路径, 模板内起始位置, 结束位置)]
+        self._static_files = []
+        self._static_written = False
         self._loaded = False
+        self._inline = False  # 模板来自文本而非模板文件(分布式工作节点)
+        self.total_time = None  # 分析步总时间(每个模板计算一次，供作业监视预测耗时)
 
     def load_template(self):
         """加载模板文件"""
@@ -18,15 +45,26 @@ class TemplateParser:
             raise FileNotFoundError(f"模板文件不存在: {self.template_path}")
 
         with open(self.template_path, 'r', encoding='utf-8') as f:
-            self.template_content = f.read()
+            self._load_content(f.read())
+
+    def load_text(self, content):
+        """从模板文本加载(分布式工作节点使用协调节点发送的模板)"""
+        self._inline = True
+        self._load_content(content)
+
+    def _load_content(self, content):
+        self.template_content = content
+        self.template_hash = hashlib.sha1(self.template_content.encode('utf-8')).hexdigest()
 
         # 打印模板内容前20行用于调试
-        print("\n🔍 加载模板文件内容 (前20行):")
-        lines = self.template_content.split('\n')
+        debug("\n🔍 加载模板文件内容 (前20行):")
+        lines = self.template_content.split('\n', 20)
         for i, line in enumerate(lines[:20]):
-            print(f"{i + 1:3d} | {line}")
+            debug(f"{i + 1:3d} | {line}")
 
         self._identify_parameters()
+        self._compile()
+        self.total_time = analysis_time(self.template_path, text=self.template_content)
         self._loaded = True
 
     def _identify_parameters(self):
@@ -36,11 +74,118 @@ class TemplateParser:
             print("⚠ 模板文件中未找到参数占位符 (格式: ${param_name})")
             return
 
-        unique_params = list(set(matches))
-        print(f"🔍 识别到 {len(unique_params)} 个优化参数: {', '.join(unique_params)}")
+        # 参数顺序需在所有进程中一致: INPEditor生成的 x1, x2, ... 按编号排序(与边界顺序一致)，
+        # 其他名称按首次出现的位置排序
+        first_seen = list(dict.fromkeys(matches))
+
+        def order_key(name):
+            number = re.fullmatch(r"x(\d+)", name)
+            return (0, int(number.group(1)), 0) if number else (1, 0, first_seen.index(name))
+
+        unique_params = sorted(first_seen, key=order_key)
+        log(f"🔍 识别到 {len(unique_params)} 个优化参数: {', '.join(unique_params)}")
         self.param_map = {param: f"${param}" for param in unique_params}
         return unique_params
 
+    def _split_segments(self):
+        """
+        按行将模板划分为静态段和参数化段
+        :return: [(是否静态, 起始位置, 结束位置)]
+        """
+        segments = []
+        pos = 0
+        unit_start = 0
+        for line in self.template_content.splitlines(keepends=True):
+            pos += len(line)
+            # 以逗号结尾的行(关键字或数据的续行)不能与下一行拆开
+            if line.rstrip().endswith(','):
+                continue
+            static = re.search(self.param_pattern, self.template_content[unit_start:pos]) is None
+            if segments and segments[-1][0] == static:
+                segments[-1][2] = pos
+            else:
+                segments.append([static, unit_start, pos])
+            unit_start = pos
+        if unit_start < len(self.template_content):
+            segments.append([False, unit_start, len(self.template_content)])
+        return segments
+
+    def _build_split_template(self):
+        """
+        将较大的静态段替换为*INCLUDE引用，静态文件所有作业共享，
+        每个作业只需写入参数化部分
+        """
+        # 作业在临时目录运行时，共享的静态文件也放在临时目录
+        static_dir = os.path.join(SCRATCH_DIR or RESULT_DIR, STATIC_DIR_NAME, self.template_hash[:16])
+        pieces = []
+        self._static_files = []
+        for static, start, end in self._split_segments():
+            text = self.template_content[start:end]
+            if not static or end - start < INCLUDE_MIN_BYTES:
+                pieces.append(text)
+                continue
+
+            path = os.path.join(static_dir, f"static_{len(self._static_files) + 1}.inp")
+            reference = f'"{path}"' if (' ' in path or ',' in path) else path
+            include_line = f"*INCLUDE, INPUT={reference}"
+            if len(include_line) > MAX_INP_LINE_LENGTH:
+                print(f"⚠️ 静态文件路径过长，不拆分INCLUDE: {path}")
+                self._static_files = []
+                return self.template_content
+
+            self._static_files.append((path, start, end))
+            if pieces and not pieces[-1].endswith('\n'):
+                pieces.append('\n')
+            pieces.append(include_line + '\n')
+
+        if self._static_files:
+            size = sum(end - start for _, start, end in self._static_files)
+            log(f"✂️ 静态部分拆分为 {len(self._static_files)} 个INCLUDE文件 ({size / 1e6:.1f} MB)")
+        return ''.join(pieces)
+
+    def _write_static_files(self):
+        """写入共享的静态INCLUDE文件(已存在则跳过，多进程并发写入安全)"""
+        for path, start, end in self._static_files:
+            if os.path.exists(path):
+                continue
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(self.template_content[start:end])
+                if not self.template_content[start:end].endswith('\n'):
+                    f.write('\n')
+            os.replace(tmp_path, path)
+        self._static_written = True
+
+    def _compile(self):
+        """将模板预编译为字面文本片段和参数槽位，渲染时只需一次拼接"""
+        template = self._build_split_template() if SPLIT_INCLUDE else self.template_content
+        self._static_written = False
+
+        # re.split带捕获组时，奇数位置为参数名，偶数位置为字面文本
+        parts = re.split(self.param_pattern, template)
+        index = {name: i for i, name in enumerate(self.param_map)}
+        self._chunks = parts[0::2]
+        self._slots = [index[name] for name in parts[1::2]]
+
+    def format_values(self, parameters):
+        """按各参数的写入格式生成INP中的参数文本(评估缓存也以此为键)"""
+        names = list(self.param_map.keys())
+        return [
+            format(float(value), self.format_specs.get(name, DEFAULT_PARAM_FORMAT))
+            for name, value in zip(names, parameters)
+        ]
+
+    def render(self, parameters):
+        """按参数向量渲染模板内容"""
+        values = self.format_values(parameters)
+
+        pieces = [self._chunks[0]]
+        for slot, chunk in zip(self._slots, self._chunks[1:]):
+            pieces.append(values[slot])
+            pieces.append(chunk)
+        return ''.join(pieces)
+
     def get_parameters(self):
         """获取参数列表"""
         if not self._loaded:
@@ -68,14 +213,9 @@ class TemplateParser:
                 f"实际提供 {len(parameters)} 个"
             )
 
-        content = self.template_content
-        param_names = list(self.param_map.keys())
-
-        # 确保参数按顺序替换
-        for i, param_name in enumerate(param_names):
-            placeholder = self.param_map[param_name]
-            # 使用完整的 ${param} 格式进行替换
-            content = content.replace(f"${{{param_name}}}", f"{parameters[i]:.6f}")
+        if self._static_files and not self._static_written:
+            self._write_static_files()
+        content = self.render(parameters)
 
         os.makedirs(job_dir, exist_ok=True)
         inp_path = os.path.join(job_dir, f"{job_name}.inp")
@@ -84,22 +224,30 @@ class TemplateParser:
             f.write(content)
 
         # 打印生成的INP文件前10行用于调试
-        print("\n📄 生成的INP文件内容 (前10行):")
-        lines = content.split('\n')
+        debug("\n📄 生成的INP文件内容 (前10行):")
+        lines = content.split('\n', 10)
         for i, line in enumerate(lines[:10]):
-            print(f"{i + 1:3d} | {line}")
+            debug(f"{i + 1:3d} | {line}")
 
         return inp_path
 
     def __getstate__(self):
         """用于序列化"""
         state = self.__dict__.copy()
-        # 移除不能序列化的属性
-        state.pop('template_content', None)
+        # 移除不能序列化的属性(模板内容及编译结果在反序列化时重新加载)
+        if not self._inline:
+            state.pop('template_content', None)
+        state.pop('_chunks', None)
+        state.pop('_slots', None)
+        state.pop('_static_files', None)
+        state.pop('_static_written', None)
         return state
 
     def __setstate__(self, state):
         """用于反序列化"""
         self.__dict__.update(state)
         # 重新加载模板内容
-        self.load_template()
\ No newline at end of file
+        if getattr(self, '_inline', False):
+            self._load_content(self.template_content)
+        else:
+            self.load_template()
\ No newline at end of file